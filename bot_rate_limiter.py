@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+מגביל קצב לבקשות היוצאות ל-Telegram - Outgoing request rate limiter for the bot
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# מעט מתחת למגבלה של Telegram - 30 הודעות בשנייה לכל הבוט
+OVERALL_MAX_RATE = 28
+OVERALL_TIME_PERIOD = 1.0
+
+# מספר הניסיונות החוזרים אחרי שגיאת RetryAfter (429)
+MAX_RETRIES = 3
+
+
+class AsyncTokenBucket:
+    """דלי אסימונים אסינכרוני - הממתינים מקבלים אסימון לפי סדר הגעתם"""
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.capacity = max_rate
+        self.fill_rate = max_rate / time_period
+        self.tokens = float(max_rate)
+        self.last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.fill_rate)
+        self.last_update = now
+
+    async def acquire(self):
+        """המתנה לאסימון פנוי"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class BotRateLimiter(BaseRateLimiter):
+    """שומר על קצב ההודעות מתחת למגבלה של Telegram ומנסה שוב אחרי RetryAfter
+
+    כל בקשה עם chat_id צורכת אסימון מהדלי הכללי. שגיאת RetryAfter עוצרת את כל
+    הבקשות עד שהזמן שביקש Telegram עובר, ואז הבקשה נשלחת שוב.
+    rate_limit_args של בקשה בודדת קובע את מספר הניסיונות החוזרים שלה.
+    """
+
+    def __init__(self, overall_max_rate: float = OVERALL_MAX_RATE,
+                 overall_time_period: float = OVERALL_TIME_PERIOD,
+                 max_retries: int = MAX_RETRIES):
+        self.overall_max_rate = overall_max_rate
+        self.overall_time_period = overall_time_period
+        self.max_retries = max_retries
+        self._bucket: Optional[AsyncTokenBucket] = None
+        self._retry_after_event: Optional[asyncio.Event] = None
+
+    async def initialize(self) -> None:
+        """יצירת הדלי והאירוע בתוך לולאת האירועים של האפליקציה"""
+        self._bucket = AsyncTokenBucket(self.overall_max_rate, self.overall_time_period)
+        self._retry_after_event = asyncio.Event()
+        self._retry_after_event.set()
+
+    async def shutdown(self) -> None:
+        """אין משאבים לשחרור"""
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Any:
+        """שליחת הבקשה בקצב המותר, עם ניסיונות חוזרים אחרי RetryAfter"""
+        if self._bucket is None:
+            await self.initialize()
+
+        max_retries = self.max_retries if rate_limit_args is None else rate_limit_args
+        limited = data.get('chat_id') is not None
+
+        for attempt in range(max_retries + 1):
+            await self._retry_after_event.wait()
+            if limited:
+                await self._bucket.acquire()
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == max_retries:
+                    logger.error(f"Rate limit hit on {endpoint} after {max_retries} retries")
+                    raise
+
+                sleep = float(e.retry_after) + 0.1
+                logger.warning(f"Rate limit hit on {endpoint}, retrying in {sleep:.1f}s")
+                self._retry_after_event.clear()
+                try:
+                    await asyncio.sleep(sleep)
+                finally:
+                    self._retry_after_event.set()
+
+        return None
@@ -4,13 +4,32 @@
 """
 
 import os
+import sys
+from functools import lru_cache
 from dotenv import load_dotenv
 
-load_dotenv()
+
+@lru_cache(maxsize=1)
+def load_environment() -> bool:
+    """טעינת קובץ .env פעם אחת בלבד לכל תהליך"""
+    load_dotenv()
+    return True
+
+
+load_environment()
+_ENV = os.environ
+
+
+def _intern_keys(d: dict) -> dict:
+    """הפיכת מפתחות המילון (כולל מילונים פנימיים) למחרוזות interned"""
+    return {
+        sys.intern(k): (_intern_keys(v) if isinstance(v, dict) else v)
+        for k, v in d.items()
+    }
 
 # Bot Configuration
-BOT_TOKEN = os.getenv('BOT_TOKEN')
-GOOGLE_CREDENTIALS_FILE = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+BOT_TOKEN = _ENV.get('BOT_TOKEN')
+GOOGLE_CREDENTIALS_FILE = _ENV.get('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
 
 # Hebrew Text Constants
 HEBREW_TEXTS = {
@@ -77,6 +96,7 @@ HEBREW_TEXTS = {
         'new_analysis': '🆕 ניתוח חדש'
     }
 }
+HEBREW_TEXTS = _intern_keys(HEBREW_TEXTS)
 
 # Chart Configuration
 CHART_CONFIG = {
@@ -86,6 +106,7 @@ CHART_CONFIG = {
     'font_family': 'DejaVu Sans',
     'hebrew_font': 'Arial'
 }
+CHART_CONFIG = _intern_keys(CHART_CONFIG)
 
 # Database Configuration
 DATABASE_PATH = 'bot_database.db'
@@ -5,22 +5,152 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 import logging
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
+import sys
 import warnings
+from functools import cached_property
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+# מספר השורות המינימלי להרצת PCA בניתוח הפילוח
+PCA_MIN_ROWS = 1000
+
+# מספר השורות המינימלי להרצת ניתוח פילוח מתוך הסיכום
+SEGMENTATION_MIN_ROWS = 10
+
+# יחס ערכים ייחודיים מתחתיו עמודת טקסט מומרת ל-category
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# ערך מוחלט מקסימלי לעמודה שמותר להמיר ל-float32
+FLOAT32_MAX_ABS = 1e6
+
+# מילות מפתח לשאלות בשפה טבעית
+_MEAN_KW = frozenset(map(sys.intern, ('ממוצע', 'ממוצעים', 'ממוצע של')))
+_SUM_KW = frozenset(map(sys.intern, ('סכום', 'סה"כ', 'סה"כ של')))
+_MAX_KW = frozenset(map(sys.intern, ('הכי הרבה', 'הכי גדול', 'הכי גבוה', 'מקסימום')))
+_MIN_KW = frozenset(map(sys.intern, ('הכי מעט', 'הכי קטן', 'הכי נמוך', 'מינימום')))
+_COUNT_KW = frozenset(map(sys.intern, ('כמה', 'גודל', 'מספר')))
+_ROWS_KW = frozenset(map(sys.intern, ('שורות', 'רשומות')))
+_COLS_KW = frozenset(map(sys.intern, ('עמודות',)))
+_TREND_KW = frozenset(map(sys.intern, ('מגמה', 'טרנד', 'כיוון')))
+
+
+def _has_keyword(question_lower: str, tokens: set, keywords: frozenset) -> bool:
+    """בדיקה אם אחת ממילות המפתח מופיעה בשאלה"""
+    # התאמה מהירה למילה שלמה, ואחריה חיפוש תת-מחרוזת (תחיליות כמו "ה", "ב" וביטויים של שתי מילים)
+    if not keywords.isdisjoint(tokens):
+        return True
+    return any(word in question_lower for word in keywords)
+
+
+class ColumnStats:
+    """סטטיסטיקות של עמודה אחת - כל ערך מחושב בגישה הראשונה ונשמר
+
+    העמודה עצמה מוחזקת רק בזמן השימוש (bind / release), כך שהאובייקט
+    יכול להישמר בסשן בלי להחזיק את הנתונים בזיכרון
+    """
+
+    def __init__(self, series: Optional[pd.Series] = None):
+        self._series = series
+
+    def bind(self, series: pd.Series) -> 'ColumnStats':
+        """חיבור העמודה לחישוב ערכים שעוד לא נשמרו"""
+        self._series = series
+        return self
+
+    def release(self):
+        """שחרור ההפניה לעמודה - הערכים שחושבו נשארים"""
+        self._series = None
+
+    @cached_property
+    def value_counts_top10(self) -> pd.Series:
+        """עשרת הערכים הנפוצים ביותר ומספר ההופעות שלהם"""
+        return self._series.value_counts().head(10)
+
+    @cached_property
+    def nunique(self) -> int:
+        """מספר הערכים הייחודיים"""
+        return int(self._series.nunique())
+
+    @cached_property
+    def mean(self) -> Optional[float]:
+        """ממוצע העמודה - None לעמודה לא מספרית או ריקה"""
+        if not pd.api.types.is_numeric_dtype(self._series):
+            return None
+        value = self._series.mean()
+        return None if pd.isna(value) else float(value)
+
+
 class DataAnalyzer:
     def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
-        self.original_df = df.copy()
+        # שמירת הפניה בלבד - עותק נוצר רק לפני שינוי במקום (copy-on-write)
+        self.df = df
+        self.original_df = df
+        self._owns_df = False
         self.insights = {}
         self.analysis_results = {}
+        self._numeric_cols = None
+        self._object_cols = None
+        self._numeric_cols_lc = None
+        self._null_counts = None
+        self._is_num = None
+        self._num_agg = None
+    
+    def bind(self, df: pd.DataFrame) -> 'DataAnalyzer':
+        """חיבור גרסה טעונה מחדש של אותם נתונים - הטבלאות שחושבו נשארות בתוקף"""
+        self.df = df
+        self.original_df = df
+        self._owns_df = False
+        return self
+    
+    def release(self):
+        """שחרור ההפניה לנתונים, כך שאפשר לשמור את המנתח בסשן בלי להחזיק אותם בזיכרון"""
+        self.df = None
+        self.original_df = None
+    
+    @property
+    def numeric_cols(self) -> Tuple[str, ...]:
+        """עמודות מספריות (נשמר במטמון עד לשינוי הנתונים)"""
+        if self._numeric_cols is None:
+            self._numeric_cols = tuple(self.df.select_dtypes(include=[np.number]).columns)
+        return self._numeric_cols
+    
+    @property
+    def object_cols(self) -> Tuple[str, ...]:
+        """עמודות טקסט (נשמר במטמון עד לשינוי הנתונים)"""
+        if self._object_cols is None:
+            self._object_cols = tuple(self.df.select_dtypes(include=['object', 'string', 'category']).columns)
+        return self._object_cols
+    
+    def _ensure_own_copy(self):
+        """יצירת עותק של הנתונים לפני שינוי במקום, כדי לא לשנות את ה-DataFrame של הקורא"""
+        if not self._owns_df:
+            self.df = self.df.copy()
+            self._owns_df = True
+    
+    def _is_numeric(self, col: str) -> bool:
+        """בדיקה אם עמודה מספרית, לפי מיפוי שנבנה פעם אחת לכל גרסת נתונים"""
+        if self._is_num is None:
+            numeric = set(self.numeric_cols)
+            self._is_num = {c: c in numeric for c in self.df.columns}
+        return self._is_num.get(col, False)
+    
+    def _null_counts_series(self) -> pd.Series:
+        """מספר הערכים החסרים בכל עמודה (נשמר במטמון עד לשינוי הנתונים)"""
+        if self._null_counts is None:
+            self._null_counts = self.df.isna().sum()
+        return self._null_counts
+    
+    def _invalidate_cache(self):
+        """איפוס המטמון לאחר שינוי בנתונים"""
+        self._numeric_cols = None
+        self._object_cols = None
+        self._numeric_cols_lc = None
+        self._null_counts = None
+        self._is_num = None
+        self._num_agg = None
     
     def clean_data(self) -> pd.DataFrame:
         """ניקוי וטיפול בנתונים"""
@@ -30,26 +160,50 @@ class DataAnalyzer:
             
             # הסרת שורות ריקות לחלוטין
             self.df = self.df.dropna(how='all', axis=0)
+            self._invalidate_cache()
             
-            # טיפול בערכים חסרים
-            for col in self.df.columns:
-                if self.df[col].dtype in ['object', 'string']:
-                    # עבור טקסט - מילוי בערך הנפוץ ביותר
-                    if self.df[col].isnull().sum() > 0:
-                        mode_val = self.df[col].mode().iloc[0] if not self.df[col].mode().empty else "לא ידוע"
-                        self.df[col].fillna(mode_val, inplace=True)
-                else:
-                    # עבור מספרים - מילוי בממוצע או חציון
-                    if self.df[col].isnull().sum() > 0:
-                        if self.df[col].dtype in ['int64', 'float64']:
-                            median_val = self.df[col].median()
-                            self.df[col].fillna(median_val, inplace=True)
-            
-            # הסרת שורות כפולות
-            self.df = self.df.drop_duplicates()
+            # טיפול בערכים חסרים - רק בעמודות שיש בהן ערכים חסרים
+            null_counts = self._null_counts_series()
+            na_cols = null_counts.index[null_counts.to_numpy() > 0]
+            fill_values = {}
+
+            # עבור מספרים - מילוי בחציון
+            num_cols = self.df.select_dtypes(include=[np.number]).columns.intersection(na_cols)
+            if len(num_cols) > 0:
+                fill_values.update(self.df[num_cols].median().to_dict())
+
+            # עבור טקסט - מילוי בערך הנפוץ ביותר
+            obj_cols = self.df.select_dtypes(include=['object', 'string']).columns.intersection(na_cols)
+            if len(obj_cols) > 0:
+                modes = self.df[obj_cols].mode()
+                mode_row = modes.iloc[0].to_dict() if not modes.empty else {}
+                fill_values.update({
+                    col: mode_row[col] if pd.notna(mode_row.get(col)) else "לא ידוע"
+                    for col in obj_cols
+                })
+
+            if fill_values:
+                self.df = self.df.fillna(value=fill_values)
+
+            # הסרת שורות כפולות - hash וקטורי בוחר מועמדים, duplicated() מאמת אותם
+            # (hash של תאי object עובר דרך הטקסט, כך ש-1 ו-'1' מקבלים אותו hash)
+            row_hashes = pd.util.hash_pandas_object(self.df, index=False)
+            candidates = row_hashes.duplicated(keep=False).to_numpy()
+            if candidates.any():
+                is_dup = np.zeros(len(self.df), dtype=bool)
+                is_dup[candidates] = self.df[candidates].duplicated().to_numpy()
+                self.df = self.df[~is_dup]
+            self._owns_df = True  # dropna/fillna/סינון שורות מחזירים אובייקט חדש
+            
+            # הקטנת סוגי נתונים מספריים לחיסכון בזיכרון
+            self._downcast_numeric()
+            self._categorize_text()
             
             # ניקוי שמות עמודות
-            self.df.columns = self.df.columns.str.strip().str.replace(' ', '_')
+            self.df.columns = self.df.columns.astype(str).str.strip().str.replace(' ', '_')
+            # אינטרנינג לשמות העמודות - גישה חוזרת ל-self.df[col] משווה מצביעים
+            self.df.columns = pd.Index([sys.intern(c) for c in self.df.columns])
+            self._invalidate_cache()
             
             logger.info("Data cleaning completed successfully")
             return self.df
@@ -58,35 +212,65 @@ class DataAnalyzer:
             logger.error(f"Error cleaning data: {e}")
             return self.original_df
     
+    def _downcast_numeric(self):
+        """המרת עמודות מספריות ל-float32 / מספר שלם קטן יותר כשאין איבוד דיוק משמעותי"""
+        for col in self.df.select_dtypes(include=['integer']).columns:
+            self.df[col] = pd.to_numeric(self.df[col], downcast='integer')
+        
+        for col in self.df.select_dtypes(include=['floating']).columns:
+            # float32 שומר כ-7 ספרות משמעותיות - מדלגים על עמודות עם טווח ערכים גדול
+            if self.df[col].abs().max() < FLOAT32_MAX_ABS:
+                self.df[col] = pd.to_numeric(self.df[col], downcast='float')
+    
+    def _categorize_text(self):
+        """המרת עמודות טקסט עם מעט ערכים ייחודיים ל-category (קודים שלמים במקום אובייקטים)"""
+        n_rows = max(len(self.df), 1)
+        for col in self.df.select_dtypes(include=['object']).columns:
+            s = self.df[col]
+            if s.nunique(dropna=False) / n_rows < CATEGORY_MAX_UNIQUE_RATIO:
+                self.df[col] = s.astype('category')
+    
     def get_basic_info(self) -> Dict[str, Any]:
         """קבלת מידע בסיסי על הנתונים"""
         try:
+            nulls = self._null_counts_series()
+            null_counts = nulls.to_dict()
+            nuniques = self.df.nunique().to_dict()
+            dtypes = self.df.dtypes.to_dict()
+            n_rows = len(self.df)
+            
             info = {
                 'shape': self.df.shape,
                 'columns': list(self.df.columns),
-                'data_types': self.df.dtypes.to_dict(),
+                'data_types': dtypes,
                 'memory_usage': self.df.memory_usage(deep=True).sum(),
-                'null_counts': self.df.isnull().sum().to_dict(),
+                'null_counts': null_counts,
                 'duplicate_rows': self.df.duplicated().sum()
             }
             
+            # סטטיסטיקות לכל העמודות המספריות בקריאה אחת
+            stat_cols = list(self.numeric_cols)
+            desc = self.df[stat_cols].describe().T.to_dict('index') if stat_cols else {}
+            
             # הוספת מידע על עמודות
             column_info = {}
             for col in self.df.columns:
                 col_info = {
-                    'type': str(self.df[col].dtype),
-                    'unique_values': self.df[col].nunique(),
-                    'null_count': self.df[col].isnull().sum(),
-                    'null_percentage': round((self.df[col].isnull().sum() / len(self.df)) * 100, 2)
+                    'type': str(dtypes[col]),
+                    'unique_values': nuniques[col],
+                    'null_count': null_counts[col],
+                    'null_percentage': round((null_counts[col] / n_rows) * 100, 2)
                 }
                 
-                if self.df[col].dtype in ['int64', 'float64']:
+                if col in desc:
+                    stats = desc[col]
+                    has_values = stats['count'] > 0
                     col_info.update({
-                        'min': float(self.df[col].min()) if not self.df[col].isnull().all() else None,
-                        'max': float(self.df[col].max()) if not self.df[col].isnull().all() else None,
-                        'mean': float(self.df[col].mean()) if not self.df[col].isnull().all() else None,
-                        'median': float(self.df[col].median()) if not self.df[col].isnull().all() else None,
-                        'std': float(self.df[col].std()) if not self.df[col].isnull().all() else None
+                        'min': float(stats['min']) if has_values else None,
+                        'max': float(stats['max']) if has_values else None,
+                        'mean': float(stats['mean']) if has_values else None,
+                        'median': float(stats['50%']) if has_values else None,
+                        'std': float(stats['std']) if has_values else None
                     })
                 
                 column_info[col] = col_info
@@ -103,21 +287,25 @@ class DataAnalyzer:
         """זיהוי ערכים חריגים בעמודות מספריות"""
         try:
             if columns is None:
-                columns = self.df.select_dtypes(include=[np.number]).columns.tolist()
+                columns = list(self.numeric_cols)
             
+            columns = [col for col in columns if self._is_numeric(col)]
+
             outliers = {}
-            for col in columns:
-                if col in self.df.columns and self.df[col].dtype in ['int64', 'float64']:
-                    Q1 = self.df[col].quantile(0.25)
-                    Q3 = self.df[col].quantile(0.75)
-                    IQR = Q3 - Q1
-                    
-                    lower_bound = Q1 - 1.5 * IQR
-                    upper_bound = Q3 + 1.5 * IQR
-                    
-                    outlier_indices = self.df[(self.df[col] < lower_bound) | (self.df[col] > upper_bound)].index.tolist()
-                    outliers[col] = outlier_indices
-            
+            if columns:
+                # חישוב הרבעונים לכל העמודות בבת אחת
+                num_df = self.df[columns]
+                Q1, Q3 = num_df.quantile([0.25, 0.75]).to_numpy()
+                IQR = Q3 - Q1
+
+                lower_bound = Q1 - 1.5 * IQR
+                upper_bound = Q3 + 1.5 * IQR
+
+                values = num_df.to_numpy(dtype=float, na_value=np.nan)
+                mask = (values < lower_bound) | (values > upper_bound)
+                index = num_df.index.to_numpy()
+                outliers = {col: index[mask[:, j]].tolist() for j, col in enumerate(columns)}
+
             self.analysis_results['outliers'] = outliers
             return outliers
             
@@ -128,23 +316,26 @@ class DataAnalyzer:
     def correlation_analysis(self, method: str = 'pearson') -> pd.DataFrame:
         """ניתוח קורלציה בין עמודות מספריות"""
         try:
-            numeric_cols = self.df.select_dtypes(include=[np.number]).columns
+            numeric_cols = list(self.numeric_cols)
             if len(numeric_cols) < 2:
                 return pd.DataFrame()
             
             correlation_matrix = self.df[numeric_cols].corr(method=method)
             
             # זיהוי קורלציות חזקות
-            strong_correlations = []
-            for i in range(len(correlation_matrix.columns)):
-                for j in range(i+1, len(correlation_matrix.columns)):
-                    corr_value = correlation_matrix.iloc[i, j]
-                    if abs(corr_value) > 0.7:  # קורלציה חזקה
-                        strong_correlations.append({
-                            'column1': correlation_matrix.columns[i],
-                            'column2': correlation_matrix.columns[j],
-                            'correlation': corr_value
-                        })
+            cols = correlation_matrix.columns
+            mat = correlation_matrix.to_numpy()
+            i_idx, j_idx = np.triu_indices(len(cols), k=1)
+            values = mat[i_idx, j_idx]
+            strong = np.abs(values) > 0.7  # קורלציה חזקה
+            strong_correlations = [
+                {
+                    'column1': cols[i],
+                    'column2': cols[j],
+                    'correlation': float(value)
+                }
+                for i, j, value in zip(i_idx[strong], j_idx[strong], values[strong])
+            ]
             
             self.analysis_results['correlation_matrix'] = correlation_matrix
             self.analysis_results['strong_correlations'] = strong_correlations
@@ -163,19 +354,24 @@ class DataAnalyzer:
             # אם יש עמודת תאריך
             if date_column and date_column in self.df.columns:
                 try:
+                    self._ensure_own_copy()
                     self.df[date_column] = pd.to_datetime(self.df[date_column], errors='coerce')
                     self.df = self.df.dropna(subset=[date_column])
+                    self._invalidate_cache()
                     
                     if value_column and value_column in self.df.columns:
                         # ניתוח מגמה פשוט
                         self.df = self.df.sort_values(date_column)
                         
-                        # חישוב מגמה לינארית
-                        x = np.arange(len(self.df))
-                        y = self.df[value_column].values
+                        # חישוב מגמה לינארית - שיפוע ריבועים פחותים בנוסחה סגורה
+                        y = self.df[value_column].to_numpy(dtype=float)
+                        n = y.size
                         
-                        if len(y) > 1:
-                            slope = np.polyfit(x, y, 1)[0]
+                        if n > 1:
+                            x_centered = np.arange(n) - (n - 1) / 2.0
+                            slope = float(np.dot(x_centered, y - y.mean()) / (n * (n * n - 1) / 12.0))
+                            if not np.isfinite(slope):
+                                raise ValueError(f"Column '{value_column}' contains missing values")
                             trends['slope'] = slope
                             trends['trend_direction'] = 'עולה' if slope > 0 else 'יורדת' if slope < 0 else 'יציבה'
                             trends['trend_strength'] = abs(slope)
@@ -190,14 +386,16 @@ class DataAnalyzer:
                     logger.warning(f"Date trend analysis failed: {e}")
             
             # ניתוח מגמות בעמודות מספריות
-            numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-            for col in numeric_cols:
-                if len(self.df[col].dropna()) > 1:
-                    # חישוב שינוי יחסי
-                    sorted_values = self.df[col].dropna().sort_values()
-                    if len(sorted_values) > 1:
-                        relative_change = (sorted_values.iloc[-1] - sorted_values.iloc[0]) / sorted_values.iloc[0]
-                        trends[f'{col}_relative_change'] = relative_change
+            if self.numeric_cols:
+                # חישוב שינוי יחסי בין המינימום למקסימום - ללא מיון
+                num_df = self.df[list(self.numeric_cols)]
+                counts = num_df.count()
+                mins = num_df.min()
+                maxs = num_df.max()
+                relative_change = (maxs - mins) / mins.replace(0, np.nan)
+                for col, value in relative_change[counts > 1].items():
+                    if pd.notna(value):
+                        trends[f'{col}_relative_change'] = value
             
             self.analysis_results['trends'] = trends
             return trends
@@ -210,7 +408,7 @@ class DataAnalyzer:
         """ניתוח פילוח וקבצים"""
         try:
             if columns is None:
-                columns = self.df.select_dtypes(include=[np.number]).columns.tolist()
+                columns = list(self.numeric_cols)
             
             if len(columns) < 2:
                 return {}
@@ -221,46 +419,61 @@ class DataAnalyzer:
             if len(analysis_data) < n_clusters:
                 return {}
             
-            # נרמול הנתונים
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(analysis_data)
+            # טעינת sklearn רק כשבאמת מבצעים פילוח
+            from sklearn.cluster import MiniBatchKMeans
+            from sklearn.decomposition import PCA
+            
+            # נרמול הנתונים (z-score)
+            arr = np.ascontiguousarray(analysis_data.to_numpy(dtype=np.float32))
+            mu = arr.mean(axis=0)
+            sigma = arr.std(axis=0)
+            sigma[sigma == 0] = 1.0
+            scaled_data = (arr - mu) / sigma
             
             # ניתוח קבצים
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+            kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=1024, n_init=3, random_state=42)
             clusters = kmeans.fit_predict(scaled_data)
             
-            # ניתוח PCA להפחתת מימדים
-            pca = PCA(n_components=2)
-            pca_data = pca.fit_transform(scaled_data)
+            # ניתוח PCA להפחתת מימדים - רק עבור מערכי נתונים גדולים
+            pca_data = None
+            explained_variance = []
+            if len(analysis_data) > PCA_MIN_ROWS:
+                pca = PCA(n_components=2)
+                pca_data = pca.fit_transform(scaled_data).astype(np.float32)
+                explained_variance = pca.explained_variance_ratio_.tolist()
             
             segmentation_results = {
                 'clusters': clusters.tolist(),
                 'cluster_centers': kmeans.cluster_centers_.tolist(),
-                'pca_data': pca_data.tolist(),
-                'explained_variance': pca.explained_variance_ratio_.tolist(),
+                'pca_data': pca_data,
+                'explained_variance': explained_variance,
                 'columns_used': columns
             }
             
-            # ניתוח כל קבץ
+            # ניתוח כל קבץ - כל הסטטיסטיקות במעבר groupby אחד
+            stats = (analysis_data.groupby(clusters)
+                     .agg(['mean', 'std', 'min', 'max'])
+                     .reindex(range(n_clusters)))
+            # מערך אחד בצורה (קבץ, עמודה, סטטיסטיקה) במקום שליפת ערכים בודדים
+            stats_arr = stats.to_numpy(dtype=float).reshape(n_clusters, len(columns), 4).tolist()
+            sizes = np.bincount(clusters, minlength=n_clusters)
+            
             cluster_analysis = {}
             for i in range(n_clusters):
-                cluster_mask = clusters == i
-                cluster_data = analysis_data[cluster_mask]
-                
+                row = stats_arr[i]
                 cluster_analysis[f'cluster_{i}'] = {
-                    'size': int(cluster_mask.sum()),
-                    'percentage': round((cluster_mask.sum() / len(analysis_data)) * 100, 2),
-                    'characteristics': {}
-                }
-                
-                for col in columns:
-                    if col in cluster_data.columns:
-                        cluster_analysis[f'cluster_{i}']['characteristics'][col] = {
-                            'mean': float(cluster_data[col].mean()),
-                            'std': float(cluster_data[col].std()),
-                            'min': float(cluster_data[col].min()),
-                            'max': float(cluster_data[col].max())
+                    'size': int(sizes[i]),
+                    'percentage': round((sizes[i] / len(analysis_data)) * 100, 2),
+                    'characteristics': {
+                        col: {
+                            'mean': row[j][0],
+                            'std': row[j][1],
+                            'min': row[j][2],
+                            'max': row[j][3]
                         }
+                        for j, col in enumerate(columns)
+                    }
+                }
             
             segmentation_results['cluster_analysis'] = cluster_analysis
             self.analysis_results['segmentation'] = segmentation_results
@@ -282,7 +495,7 @@ class DataAnalyzer:
             
             # תובנות על ערכים חסרים
             total_cells = rows * cols
-            missing_cells = self.df.isnull().sum().sum()
+            missing_cells = self._null_counts_series().sum()
             if missing_cells > 0:
                 missing_percentage = round((missing_cells / total_cells) * 100, 2)
                 insights.append(f"יש {missing_cells:,} ערכים חסרים ({missing_percentage}% מהנתונים)")
@@ -319,11 +532,11 @@ class DataAnalyzer:
                     insights.append(f"הקבץ הגדול ביותר מכיל {largest_cluster['size']} רשומות ({largest_cluster['percentage']}%)")
             
             # תובנות על עמודות
-            numeric_cols = self.df.select_dtypes(include=[np.number]).columns
+            numeric_cols = self.numeric_cols
             if len(numeric_cols) > 0:
                 insights.append(f"יש {len(numeric_cols)} עמודות מספריות לניתוח כמותי")
             
-            text_cols = self.df.select_dtypes(include=['object', 'string']).columns
+            text_cols = self.object_cols
             if len(text_cols) > 0:
                 insights.append(f"יש {len(text_cols)} עמודות טקסט לניתוח איכותני")
             
@@ -334,48 +547,55 @@ class DataAnalyzer:
             logger.error(f"Error generating insights: {e}")
             return ["לא ניתן ליצור תובנות בשל שגיאה בניתוח"]
     
+    def _numeric_cols_by_lower(self) -> Dict[str, str]:
+        """מיפוי שם עמודה מספרית באותיות קטנות לשם המקורי (נשמר במטמון)"""
+        if self._numeric_cols_lc is None:
+            self._numeric_cols_lc = {str(col).lower(): col for col in self.numeric_cols}
+        return self._numeric_cols_lc
+    
+    def _numeric_aggregates(self) -> pd.DataFrame:
+        """טבלת min/max/mean/sum לעמודות המספריות, מחושבת בשאלה הראשונה בלבד"""
+        if self._num_agg is None:
+            self._num_agg = self.df[list(self.numeric_cols)].agg(['min', 'max', 'mean', 'sum'])
+        return self._num_agg
+    
     def answer_natural_language_question(self, question: str) -> str:
         """מענה על שאלות בשפה טבעית בעברית"""
         try:
             question_lower = question.lower()
+            tokens = set(question_lower.split())
+            
+            # העמודה המספרית הראשונה שמוזכרת בשאלה (מחושב פעם אחת לכל שאלה)
+            col = next((orig for col_lc, orig in self._numeric_cols_by_lower().items()
+                        if col_lc in question_lower), None)
             
             # שאלות על סטטיסטיקות בסיסיות
-            if any(word in question_lower for word in ['ממוצע', 'ממוצעים', 'ממוצע של']):
-                for col in self.df.select_dtypes(include=[np.number]).columns:
-                    if col in question_lower:
-                        mean_val = self.df[col].mean()
-                        return f"הממוצע של {col} הוא {mean_val:.2f}"
-            
-            if any(word in question_lower for word in ['סכום', 'סה"כ', 'סה"כ של']):
-                for col in self.df.select_dtypes(include=[np.number]).columns:
-                    if col in question_lower:
-                        sum_val = self.df[col].sum()
-                        return f"הסכום של {col} הוא {sum_val:,.2f}"
+            if col is not None and _has_keyword(question_lower, tokens, _MEAN_KW):
+                mean_val = self._numeric_aggregates().at['mean', col]
+                return f"הממוצע של {col} הוא {mean_val:.2f}"
+            
+            if col is not None and _has_keyword(question_lower, tokens, _SUM_KW):
+                sum_val = self._numeric_aggregates().at['sum', col]
+                return f"הסכום של {col} הוא {sum_val:,.2f}"
             
             # שאלות על ערכים מקסימליים ומינימליים
-            if any(word in question_lower for word in ['הכי הרבה', 'הכי גדול', 'הכי גבוה', 'מקסימום']):
-                for col in self.df.select_dtypes(include=[np.number]).columns:
-                    if col in question_lower:
-                        max_val = self.df[col].max()
-                        max_idx = self.df[col].idxmax()
-                        return f"הערך הגבוה ביותר ב-{col} הוא {max_val:.2f}"
-            
-            if any(word in question_lower for word in ['הכי מעט', 'הכי קטן', 'הכי נמוך', 'מינימום']):
-                for col in self.df.select_dtypes(include=[np.number]).columns:
-                    if col in question_lower:
-                        min_val = self.df[col].min()
-                        min_idx = self.df[col].idxmin()
-                        return f"הערך הנמוך ביותר ב-{col} הוא {min_val:.2f}"
+            if col is not None and _has_keyword(question_lower, tokens, _MAX_KW):
+                max_val = self._numeric_aggregates().at['max', col]
+                return f"הערך הגבוה ביותר ב-{col} הוא {max_val:.2f}"
+            
+            if col is not None and _has_keyword(question_lower, tokens, _MIN_KW):
+                min_val = self._numeric_aggregates().at['min', col]
+                return f"הערך הנמוך ביותר ב-{col} הוא {min_val:.2f}"
             
             # שאלות על גודל הנתונים
-            if any(word in question_lower for word in ['כמה', 'גודל', 'מספר']):
-                if 'שורות' in question_lower or 'רשומות' in question_lower:
+            if _has_keyword(question_lower, tokens, _COUNT_KW):
+                if _has_keyword(question_lower, tokens, _ROWS_KW):
                     return f"יש {len(self.df):,} שורות בנתונים"
-                elif 'עמודות' in question_lower or 'עמודות' in question_lower:
+                elif _has_keyword(question_lower, tokens, _COLS_KW):
                     return f"יש {len(self.df.columns)} עמודות בנתונים"
             
             # שאלות על מגמות
-            if any(word in question_lower for word in ['מגמה', 'טרנד', 'כיוון']):
+            if _has_keyword(question_lower, tokens, _TREND_KW):
                 if 'trends' in self.analysis_results:
                     trends = self.analysis_results['trends']
                     if 'trend_direction' in trends:
@@ -391,12 +611,18 @@ class DataAnalyzer:
     def get_analysis_summary(self) -> Dict[str, Any]:
         """קבלת סיכום מלא של הניתוח"""
         try:
+            # בדיקות זולות מראש - דילוג על ניתוחים שאין להם נתונים מתאימים
+            nc = self.numeric_cols
+            
             summary = {
                 'basic_info': self.get_basic_info(),
                 'outliers': self.detect_outliers(),
                 'correlation': self.correlation_analysis(),
-                'trends': self.trend_analysis(),
-                'segmentation': self.segmentation_analysis(),
+                'trends': self.trend_analysis() if nc else {},
+                'segmentation': (
+                    self.segmentation_analysis()
+                    if len(nc) >= 2 and len(self.df) >= SEGMENTATION_MIN_ROWS else {}
+                ),
                 'insights': self.generate_insights()
             }
             
@@ -4,23 +4,267 @@
 """
 
 import sqlite3
+import asyncio
+import functools
 import json
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import quote
 import logging
 
 logger = logging.getLogger(__name__)
 
+# הגדרות חיבור - מוחלות על כל חיבור חדש
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=30000",
+)
+
+# מספר חיבורי הקריאה המקסימלי במאגר
+READER_POOL_SIZE = 4
+
+# גודל מטמון ה-statements המוכנים בכל חיבור
+CACHED_STATEMENTS = 256
+
+# מספר התהליכונים להרצת פעולות מסד הנתונים מחוץ ללולאת האירועים
+DB_EXECUTOR_WORKERS = 4
+
+# כל כמה שניות נכתבים זמני הפעילות שהצטברו
+ACTIVITY_FLUSH_INTERVAL = 5.0
+
+# זמן חיים (בשניות) של תוצאות שאילתות שמורות במטמון
+RESULT_CACHE_TTL = 2.0
+
+# שאילתות קבועות - טקסט זהה בכל קריאה מאפשר שימוש חוזר במטמון ה-statements של החיבור
+_SQL_ADD_USER = '''
+    INSERT INTO users (user_id, username, first_name, last_name)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = excluded.username,
+        first_name = excluded.first_name,
+        last_name = excluded.last_name,
+        last_activity = CURRENT_TIMESTAMP
+'''
+
+_SQL_UPDATE_ACTIVITY = '''
+    UPDATE users SET last_activity = ?
+    WHERE user_id = ?
+'''
+
+_SQL_CREATE_SESSION = '''
+    INSERT INTO sessions (user_id, file_name, file_type, file_size)
+    VALUES (?, ?, ?, ?)
+'''
+
+_SQL_ACTIVE_SESSION = '''
+    SELECT session_id, user_id, file_name, file_type, file_size,
+           upload_time, analysis_count, last_analysis
+    FROM sessions
+    WHERE user_id = ?
+    ORDER BY upload_time DESC
+    LIMIT 1
+'''
+
+# JSONB בינארי נתמך מ-SQLite 3.45 - בגרסאות ישנות נשמר JSON כטקסט
+JSONB_SUPPORTED = sqlite3.sqlite_version_info >= (3, 45, 0)
+
+_SQL_INSERT_ANALYSIS = '''
+    INSERT INTO analysis_history (session_id, analysis_type, analysis_data)
+    VALUES (?, ?, {})
+'''.format('jsonb(?)' if JSONB_SUPPORTED else '?')
+
+_SQL_BUMP_ANALYSIS_COUNT = '''
+    UPDATE sessions
+    SET analysis_count = analysis_count + ?,
+        last_analysis = CURRENT_TIMESTAMP
+    WHERE session_id = ?
+'''
+
+_SQL_ADD_SHEET = '''
+    INSERT INTO google_sheets (user_id, sheet_url, sheet_title)
+    VALUES (?, ?, ?)
+    ON CONFLICT (user_id, sheet_url) DO UPDATE SET
+        sheet_title = excluded.sheet_title,
+        last_access = CURRENT_TIMESTAMP
+'''
+
+_SQL_USER_SHEETS = '''
+    SELECT sheet_id, user_id, sheet_url, sheet_title, connected_at, last_access
+    FROM google_sheets
+    WHERE user_id = ?
+    ORDER BY last_access DESC
+'''
+
+_SQL_DELETE_OLD_HISTORY = '''
+    DELETE FROM analysis_history
+    WHERE session_id IN (
+        SELECT session_id FROM sessions
+        WHERE upload_time < datetime('now', :age)
+    )
+'''
+
+_SQL_DELETE_OLD_SESSIONS = '''
+    DELETE FROM sessions
+    WHERE upload_time < datetime('now', :age)
+'''
+
+_SQL_USER_STATS = '''
+    SELECT
+        (SELECT COUNT(*) FROM analysis_history ah
+         JOIN sessions s ON ah.session_id = s.session_id
+         WHERE s.user_id = :user_id),
+        (SELECT COUNT(*) FROM sessions WHERE user_id = :user_id),
+        (SELECT file_name FROM sessions WHERE user_id = :user_id
+         ORDER BY upload_time DESC LIMIT 1),
+        (SELECT upload_time FROM sessions WHERE user_id = :user_id
+         ORDER BY upload_time DESC LIMIT 1)
+'''
+
+def _dump_analysis(analysis_data: Dict[str, Any]) -> str:
+    """סריאליזציה קומפקטית של תוצאות ניתוח - עברית נשמרת כ-UTF-8 ולא כ-\\uXXXX"""
+    # default=str - ערכים שאינם JSON (dtype, numpy, Timestamp) נשמרים כטקסט
+    return json.dumps(analysis_data, ensure_ascii=False, separators=(',', ':'), default=str)
+
 class DatabaseManager:
     def __init__(self, db_path: str = 'bot_database.db'):
         self.db_path = db_path
+        self._in_memory = db_path == ':memory:'
+        
+        # חיבור כתיבה יחיד (SQLite מאפשר כותב אחד) ומאגר חיבורי קריאה בלבד
+        self._writer_conn = None
+        self._writer_lock = threading.RLock()
+        self._readers = queue.Queue(maxsize=READER_POOL_SIZE)
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+        
+        # מטמון תוצאות: (סוג שאילתה, user_id) -> (זמן תפוגה, תוצאה)
+        self._result_cache = {}
+        
+        # זמני פעילות ממתינים לכתיבה מרוכזת: user_id -> זמן (UTC, בפורמט של SQLite)
+        self._pending_activity = {}
+        self._activity_lock = threading.Lock()
+        self._activity_timer = None
+        
+        # תהליכונים לקריאות מקוד אסינכרוני - הכתיבה עדיין מסונכרנת דרך _writer_lock
+        self._executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS,
+                                            thread_name_prefix='db')
+        
         self.init_database()
     
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """פתיחת חיבור למסד הנתונים עם הגדרות הביצועים"""
+        # isolation_level=None - הטרנזקציות נפתחות במפורש ב-_writer
+        options = dict(check_same_thread=False, isolation_level=None,
+                       cached_statements=CACHED_STATEMENTS)
+        if read_only:
+            uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, **options)
+        else:
+            conn = sqlite3.connect(self.db_path, **options)
+            # WAL - קוראים לא נחסמים בזמן כתיבה (נשמר בקובץ, לא רלוונטי למסד בזיכרון)
+            if not self._in_memory:
+                conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def _writer(self):
+        """חיבור הכתיבה המשותף - נעול לכותב אחד, בטרנזקציה מפורשת"""
+        with self._writer_lock:
+            if self._writer_conn is None:
+                self._writer_conn = self._connect()
+            conn = self._writer_conn
+            
+            # IMMEDIATE - נעילת הכתיבה נלקחת מראש ולא נכשלת באמצע עם SQLITE_BUSY
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    
+    @contextmanager
+    def _reader(self):
+        """השאלת חיבור קריאה מהמאגר והחזרתו בסיום"""
+        # מסד בזיכרון קיים רק בחיבור הכתיבה
+        if self._in_memory:
+            with self._writer() as conn:
+                yield conn
+            return
+        
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                can_create = self._readers_created < READER_POOL_SIZE
+                if can_create:
+                    self._readers_created += 1
+            conn = self._connect(read_only=True) if can_create else self._readers.get()
+        
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    def _cached(self, kind: str, user_id: int):
+        """שליפת תוצאה שמורה שעדיין בתוקף"""
+        entry = self._result_cache.get((kind, user_id))
+        if entry is not None and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+    
+    def _cache_result(self, kind: str, user_id: int, result):
+        """שמירת תוצאת שאילתה במטמון"""
+        self._result_cache[(kind, user_id)] = (time.monotonic() + RESULT_CACHE_TTL, result)
+    
+    def _invalidate_results(self, kind: str = None, user_id: int = None):
+        """מחיקת תוצאות שמורות - לפי סוג ומשתמש, או הכל"""
+        if kind is None:
+            self._result_cache.clear()
+        elif user_id is None:
+            for key in [key for key in list(self._result_cache) if key[0] == kind]:
+                self._result_cache.pop(key, None)
+        else:
+            self._result_cache.pop((kind, user_id), None)
+    
+    async def run_async(self, method, *args, **kwargs):
+        """הרצת פעולת מסד נתונים בתהליכון נפרד בלי לחסום את לולאת האירועים"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+    
+    def close(self):
+        """סגירת כל החיבורים הפתוחים"""
+        self._executor.shutdown(wait=True)
+        self.flush_user_activity()
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+        
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._readers_lock:
+            self._readers_created = 0
+    
     def init_database(self):
         """יצירת מסד הנתונים וטבלאות נדרשות"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
                 # טבלת משתמשים
@@ -75,7 +319,34 @@ class DatabaseManager:
                     )
                 ''')
                 
-                conn.commit()
+                # אינדקסים לשאילתות החוזרות לפי משתמש / סשן
+                # כולל file_name - סטטיסטיקות המשתמש נקראות מהאינדקס בלבד, בלי דפי הטבלה
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_sessions_user_time
+                    ON sessions (user_id, upload_time DESC, file_name)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_history_session
+                    ON analysis_history (session_id)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_sheets_user_access
+                    ON google_sheets (user_id, last_access DESC)
+                ''')
+                
+                # חיבור אחד לכל גיליון של משתמש - מסדים ישנים עלולים להכיל כפילויות
+                cursor.execute('''
+                    DELETE FROM google_sheets
+                    WHERE sheet_id NOT IN (
+                        SELECT MAX(sheet_id) FROM google_sheets
+                        GROUP BY user_id, sheet_url
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_sheets_user_url
+                    ON google_sheets (user_id, sheet_url)
+                ''')
+                
                 logger.info("Database initialized successfully")
                 
         except Exception as e:
@@ -84,52 +355,64 @@ class DatabaseManager:
     def add_user(self, user_id: int, username: str = None, first_name: str = None, last_name: str = None):
         """הוספת משתמש חדש או עדכון משתמש קיים"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO users (user_id, username, first_name, last_name, last_activity)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (user_id, username, first_name, last_name))
+                cursor.execute(_SQL_ADD_USER, (user_id, username, first_name, last_name))
                 
-                conn.commit()
                 logger.info(f"User {user_id} added/updated successfully")
                 
         except Exception as e:
             logger.error(f"Error adding user {user_id}: {e}")
     
     def update_user_activity(self, user_id: int):
-        """עדכון זמן פעילות אחרון של משתמש"""
+        """עדכון זמן פעילות אחרון של משתמש - נרשם בזיכרון ונכתב במרוכז"""
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        
+        with self._activity_lock:
+            self._pending_activity[user_id] = timestamp
+            if self._activity_timer is None:
+                self._activity_timer = threading.Timer(ACTIVITY_FLUSH_INTERVAL, self.flush_user_activity)
+                self._activity_timer.daemon = True
+                self._activity_timer.start()
+    
+    def flush_user_activity(self):
+        """כתיבת כל זמני הפעילות שהצטברו בטרנזקציה אחת"""
+        with self._activity_lock:
+            pending, self._pending_activity = self._pending_activity, {}
+            timer, self._activity_timer = self._activity_timer, None
+        
+        if timer is not None:
+            timer.cancel()
+        if not pending:
+            return
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    UPDATE users SET last_activity = CURRENT_TIMESTAMP
-                    WHERE user_id = ?
-                ''', (user_id,))
-                
-                conn.commit()
+                cursor.executemany(_SQL_UPDATE_ACTIVITY, [
+                    (timestamp, user_id) for user_id, timestamp in pending.items()
+                ])
                 
         except Exception as e:
-            logger.error(f"Error updating user activity {user_id}: {e}")
+            logger.error(f"Error updating user activity for {len(pending)} users: {e}")
     
     def create_session(self, user_id: int, file_name: str, file_type: str, file_size: int) -> int:
         """יצירת סשן חדש לניתוח קובץ"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    INSERT INTO sessions (user_id, file_name, file_type, file_size)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, file_name, file_type, file_size))
+                cursor.execute(_SQL_CREATE_SESSION, (user_id, file_name, file_type, file_size))
                 
                 session_id = cursor.lastrowid
-                conn.commit()
-                
-                logger.info(f"Session {session_id} created for user {user_id}")
-                return session_id
+            
+            # ניקוי המטמון אחרי השמירה - קורא במקביל לא יחזיר למטמון את המצב הישן
+            self._invalidate_results('active_session', user_id)
+            
+            logger.info(f"Session {session_id} created for user {user_id}")
+            return session_id
                 
         except Exception as e:
             logger.error(f"Error creating session for user {user_id}: {e}")
@@ -138,21 +421,18 @@ class DatabaseManager:
     def get_active_session(self, user_id: int) -> Optional[Dict[str, Any]]:
         """קבלת הסשן הפעיל של משתמש"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT * FROM sessions 
-                    WHERE user_id = ? 
-                    ORDER BY upload_time DESC 
-                    LIMIT 1
-                ''', (user_id,))
-                
-                row = cursor.fetchone()
-                if row:
-                    columns = [description[0] for description in cursor.description]
-                    return dict(zip(columns, row))
-                return None
+            hit, session = self._cached('active_session', user_id)
+            if not hit:
+                with self._reader() as conn:
+                    cursor = conn.cursor()
+                    
+                    cursor.execute(_SQL_ACTIVE_SESSION, (user_id,))
+                    
+                    row = cursor.fetchone()
+                    session = dict(row) if row else None
+                self._cache_result('active_session', user_id, session)
+            
+            return dict(session) if session else None
                 
         except Exception as e:
             logger.error(f"Error getting active session for user {user_id}: {e}")
@@ -160,43 +440,104 @@ class DatabaseManager:
     
     def update_session_analysis(self, session_id: int, analysis_type: str, analysis_data: Dict[str, Any]):
         """עדכון סשן עם ניתוח חדש"""
+        self.update_session_analyses(session_id, [(analysis_type, analysis_data)])
+    
+    def update_session_analyses(self, session_id: int, items: List[Tuple[str, Dict[str, Any]]]):
+        """עדכון סשן עם כמה ניתוחים בבת אחת - הכנסה מרוכזת בטרנזקציה אחת"""
+        if not items:
+            return
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
-                # הוספת ניתוח להיסטוריה
-                cursor.execute('''
-                    INSERT INTO analysis_history (session_id, analysis_type, analysis_data)
-                    VALUES (?, ?, ?)
-                ''', (session_id, analysis_type, json.dumps(analysis_data)))
+                # הוספת הניתוחים להיסטוריה
+                cursor.executemany(_SQL_INSERT_ANALYSIS, [
+                    (session_id, analysis_type, _dump_analysis(analysis_data))
+                    for analysis_type, analysis_data in items
+                ])
                 
                 # עדכון סטטיסטיקות הסשן
-                cursor.execute('''
-                    UPDATE sessions 
-                    SET analysis_count = analysis_count + 1,
-                        last_analysis = CURRENT_TIMESTAMP
-                    WHERE session_id = ?
-                ''', (session_id,))
-                
-                conn.commit()
-                logger.info(f"Analysis updated for session {session_id}")
+                cursor.execute(_SQL_BUMP_ANALYSIS_COUNT, (len(items), session_id))
+            
+            # מונה הניתוחים השתנה - הסשן השמור לא מעודכן (המשתמש לא ידוע כאן)
+            self._invalidate_results('active_session')
+            
+            logger.info(f"{len(items)} analyses updated for session {session_id}")
                 
         except Exception as e:
             logger.error(f"Error updating session analysis {session_id}: {e}")
     
+    def apply_batch(self, ops: List[Tuple[str, tuple]]):
+        """כתיבת רשימת פעולות בטרנזקציה אחת, לפי סדר הגעתן
+
+        פעולות נתמכות: ('user', (user_id, username, first_name, last_name)),
+        ('sheet', (user_id, sheet_url, sheet_title)),
+        ('analysis', (session_id, analysis_type, analysis_data))
+
+        כל פעולה רצה ב-SAVEPOINT משלה - פעולה שנכשלת נרשמת ביומן ומדולגת
+        בלי לבטל את שאר הכתיבות בטרנזקציה.
+        """
+        if not ops:
+            return
+        
+        invalidations = set()
+        applied = 0
+        try:
+            with self._writer() as conn:
+                cursor = conn.cursor()
+                
+                for kind, args in ops:
+                    cursor.execute("SAVEPOINT batch_op")
+                    try:
+                        invalidation = self._apply_op(cursor, kind, args)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO batch_op")
+                        cursor.execute("RELEASE batch_op")
+                        logger.error(f"Error applying database write {kind}: {e}")
+                        continue
+                    cursor.execute("RELEASE batch_op")
+                    applied += 1
+                    if invalidation:
+                        invalidations.add(invalidation)
+            
+            # ניקוי המטמון רק אחרי שהטרנזקציה נשמרה בהצלחה
+            for kind, user_id in invalidations:
+                self._invalidate_results(kind, user_id)
+            
+            logger.info(f"{applied} of {len(ops)} database writes applied")
+                
+        except Exception as e:
+            logger.error(f"Error applying {len(ops)} database writes: {e}")
+    
+    @staticmethod
+    def _apply_op(cursor: sqlite3.Cursor, kind: str, args: tuple) -> Optional[Tuple[str, Optional[int]]]:
+        """ביצוע פעולת כתיבה אחת מהתור - מחזיר את תוצאות המטמון שיש לנקות"""
+        if kind == 'user':
+            cursor.execute(_SQL_ADD_USER, args)
+            return None
+        if kind == 'sheet':
+            cursor.execute(_SQL_ADD_SHEET, args)
+            return ('user_sheets', args[0])
+        if kind == 'analysis':
+            session_id, analysis_type, analysis_data = args
+            cursor.execute(_SQL_INSERT_ANALYSIS,
+                           (session_id, analysis_type, _dump_analysis(analysis_data)))
+            cursor.execute(_SQL_BUMP_ANALYSIS_COUNT, (1, session_id))
+            return ('active_session', None)
+        raise ValueError(f"Unknown database operation: {kind}")
+    
     def add_google_sheets_connection(self, user_id: int, sheet_url: str, sheet_title: str):
         """הוספת חיבור Google Sheets"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO google_sheets (user_id, sheet_url, sheet_title, last_access)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (user_id, sheet_url, sheet_title))
-                
-                conn.commit()
-                logger.info(f"Google Sheets connection added for user {user_id}")
+                cursor.execute(_SQL_ADD_SHEET, (user_id, sheet_url, sheet_title))
+            
+            self._invalidate_results('user_sheets', user_id)
+            
+            logger.info(f"Google Sheets connection added for user {user_id}")
                 
         except Exception as e:
             logger.error(f"Error adding Google Sheets connection for user {user_id}: {e}")
@@ -204,18 +545,17 @@ class DatabaseManager:
     def get_user_sheets(self, user_id: int) -> list:
         """קבלת כל חיבורי Google Sheets של משתמש"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT * FROM google_sheets 
-                    WHERE user_id = ? 
-                    ORDER BY last_access DESC
-                ''', (user_id,))
-                
-                rows = cursor.fetchall()
-                columns = [description[0] for description in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
+            hit, sheets = self._cached('user_sheets', user_id)
+            if not hit:
+                with self._reader() as conn:
+                    cursor = conn.cursor()
+                    
+                    cursor.execute(_SQL_USER_SHEETS, (user_id,))
+                    
+                    sheets = [dict(row) for row in cursor.fetchall()]
+                self._cache_result('user_sheets', user_id, sheets)
+            
+            return [dict(sheet) for sheet in sheets]
                 
         except Exception as e:
             logger.error(f"Error getting Google Sheets for user {user_id}: {e}")
@@ -224,21 +564,16 @@ class DatabaseManager:
     def cleanup_old_sessions(self, days_old: int = 7):
         """ניקוי סשנים ישנים"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    DELETE FROM analysis_history 
-                    WHERE created_at < datetime('now', '-{} days')
-                '''.format(days_old))
-                
-                cursor.execute('''
-                    DELETE FROM sessions 
-                    WHERE upload_time < datetime('now', '-{} days')
-                '''.format(days_old))
-                
-                conn.commit()
-                logger.info(f"Cleaned up sessions older than {days_old} days")
+                # היסטוריית הסשנים הישנים ואז הסשנים עצמם - אותו פרמטר בשתי השאילתות
+                params = {'age': f'-{int(days_old)} days'}
+                cursor.execute(_SQL_DELETE_OLD_HISTORY, params)
+                cursor.execute(_SQL_DELETE_OLD_SESSIONS, params)
+            
+            self._invalidate_results()
+            logger.info(f"Cleaned up sessions older than {days_old} days")
                 
         except Exception as e:
             logger.error(f"Error cleaning up old sessions: {e}")
@@ -246,37 +581,18 @@ class DatabaseManager:
     def get_user_stats(self, user_id: int) -> Dict[str, Any]:
         """קבלת סטטיסטיקות משתמש"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._reader() as conn:
                 cursor = conn.cursor()
                 
-                # סך כל הניתוחים
-                cursor.execute('''
-                    SELECT COUNT(*) FROM analysis_history ah
-                    JOIN sessions s ON ah.session_id = s.session_id
-                    WHERE s.user_id = ?
-                ''', (user_id,))
-                total_analyses = cursor.fetchone()[0]
-                
-                # סך כל הקבצים
-                cursor.execute('''
-                    SELECT COUNT(*) FROM sessions WHERE user_id = ?
-                ''', (user_id,))
-                total_files = cursor.fetchone()[0]
-                
-                # קובץ אחרון
-                cursor.execute('''
-                    SELECT file_name, upload_time FROM sessions 
-                    WHERE user_id = ? 
-                    ORDER BY upload_time DESC 
-                    LIMIT 1
-                ''', (user_id,))
-                last_file = cursor.fetchone()
+                # כל הסטטיסטיקות בשאילתה אחת
+                cursor.execute(_SQL_USER_STATS, {'user_id': user_id})
+                total_analyses, total_files, last_file, last_upload = cursor.fetchone()
                 
                 return {
                     'total_analyses': total_analyses,
                     'total_files': total_files,
-                    'last_file': last_file[0] if last_file else None,
-                    'last_upload': last_file[1] if last_file else None
+                    'last_file': last_file,
+                    'last_upload': last_upload
                 }
                 
         except Exception as e:
@@ -5,19 +5,54 @@
 
 import gspread
 import pandas as pd
+import numpy as np
 import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional, Tuple, Dict, Any
 import logging
+from gspread.urls import SPREADSHEET_DRIVE_URL
 from oauth2client.service_account import ServiceAccountCredentials
 from config import GOOGLE_CREDENTIALS_FILE, SCOPES
 import os
 
 logger = logging.getLogger(__name__)
 
+# דפוסי קישורי Google Sheets - מהודרים פעם אחת בטעינת המודול
+_SHEET_ID_RE = re.compile(r'/(?:spreadsheets/)?d/([a-zA-Z0-9-_]+)')
+_VALID_SHEET_RE = re.compile(r'https://docs\.google\.com/spreadsheets/|spreadsheets/d/')
+
+# זמן חיים (בשניות) של מידע על גיליון במטמון
+SHEET_INFO_TTL = 60
+# מספר הגיליונות המרבי במטמון המידע - הישנים ביותר מפונים ראשונים
+SHEET_INFO_MAX_ENTRIES = 256
+
+# מספר השורות בכל קריאה מגיליון גדול
+SHEET_CHUNK_ROWS = 5000
+
+
+@lru_cache(maxsize=1024)
+def _extract_sheet_id(url: str) -> Optional[str]:
+    """חילוץ מזהה הגיליון - נשמר במטמון לפי הקישור"""
+    match = _SHEET_ID_RE.search(url)
+    return match.group(1) if match else None
+
+def _numericise_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """המרת עמודות טקסט שכל ערכיהן מספריים לסוג מספרי"""
+    for col in df.columns:
+        values = df[col]
+        converted = pd.to_numeric(values, errors='coerce')
+        if converted.notna().sum() == values.notna().sum():
+            df[col] = converted
+    return df
+
 class GoogleSheetsManager:
     def __init__(self, credentials_file: str = GOOGLE_CREDENTIALS_FILE):
         self.credentials_file = credentials_file
         self.client = None
+        self._client_ok = False
+        self._sheet_info_cache = OrderedDict()
         self._authenticate()
     
     def _authenticate(self):
@@ -31,28 +66,18 @@ class GoogleSheetsManager:
                 self.credentials_file, SCOPES
             )
             self.client = gspread.authorize(credentials)
+            self._client_ok = True
             logger.info("Google Sheets authentication successful")
             
         except Exception as e:
             logger.error(f"Google Sheets authentication failed: {e}")
             self.client = None
+            self._client_ok = False
     
     def extract_sheet_id_from_url(self, url: str) -> Optional[str]:
         """חילוץ מזהה הגיליון מקישור URL"""
         try:
-            # דפוסים שונים של קישורי Google Sheets
-            patterns = [
-                r'/spreadsheets/d/([a-zA-Z0-9-_]+)',
-                r'/d/([a-zA-Z0-9-_]+)',
-                r'spreadsheets/d/([a-zA-Z0-9-_]+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, url)
-                if match:
-                    return match.group(1)
-            
-            return None
+            return _extract_sheet_id(url)
             
         except Exception as e:
             logger.error(f"Error extracting sheet ID from URL: {e}")
@@ -78,22 +103,19 @@ class GoogleSheetsManager:
             sheet = self.client.open_by_key(sheet_id)
             worksheet = sheet.get_worksheet(0)  # גיליון ראשון
             
-            # קבלת כל הנתונים
-            data = worksheet.get_all_records()
+            # קבלת הנתונים כרשימות שורות, בחלקים בגיליונות גדולים
+            df = self._read_worksheet(worksheet)
             
-            if not data:
+            if df is None:
                 return None, None, "הגיליון ריק או לא מכיל נתונים."
             
-            # המרה ל-DataFrame
-            df = pd.DataFrame(data)
+            # תאים ריקים כערכים חסרים
+            df = df.replace('', np.nan)
             
-            # ניקוי עמודות ריקות
-            df = df.dropna(how='all', axis=1)
+            # ניקוי שורות ועמודות ריקות
+            df = df.dropna(how='all').dropna(how='all', axis=1)
             
-            # ניקוי שורות ריקות
-            df = df.dropna(how='all', axis=0)
-            
-            return df, sheet.title, None
+            return _numericise_columns(df), sheet.title, None
             
         except gspread.exceptions.SpreadsheetNotFound:
             return None, None, "הגיליון לא נמצא. אנא ודא שהגיליון קיים ושהוא משותף עם החשבון השירות."
@@ -105,6 +127,37 @@ class GoogleSheetsManager:
             logger.error(f"Error getting sheet data: {e}")
             return None, None, f"שגיאה לא צפויה: {str(e)}"
     
+    def _read_worksheet(self, worksheet) -> Optional[pd.DataFrame]:
+        """קריאת הגיליון ל-DataFrame - שורה ראשונה היא הכותרות"""
+        row_count = getattr(worksheet, 'row_count', 0) or 0
+        
+        # גיליון קטן - קריאת API אחת
+        if row_count <= SHEET_CHUNK_ROWS:
+            values = worksheet.get_values()
+            if len(values) < 2:
+                return None
+            return pd.DataFrame(values[1:], columns=values[0])
+        
+        # גיליון גדול - קריאה בחלקים, כך שבזיכרון יש רק חלק אחד כרשימות פייתון
+        last_col = getattr(worksheet, 'col_count', 0) or 1
+        header = None
+        frames = []
+        for start in range(1, row_count + 1, SHEET_CHUNK_ROWS):
+            end = min(start + SHEET_CHUNK_ROWS - 1, row_count)
+            rows = worksheet.get_values(f"A{start}:{gspread.utils.rowcol_to_a1(end, last_col)}")
+            if header is None and rows:
+                header, rows = rows[0], rows[1:]
+            if not rows:
+                continue
+            
+            width = len(header)
+            rows = [row[:width] + [''] * (width - len(row)) for row in rows]
+            frames.append(pd.DataFrame(rows, columns=header))
+        
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+    
     def get_sheet_info(self, sheet_url: str) -> Dict[str, Any]:
         """קבלת מידע על הגיליון"""
         try:
@@ -115,6 +168,11 @@ class GoogleSheetsManager:
             if not sheet_id:
                 return {"error": "לא ניתן לזהות את הגיליון מהקישור"}
             
+            # מידע שנשלף לאחרונה מוחזר בלי קריאה נוספת ל-API
+            cached = self._sheet_info_cache.get(sheet_url)
+            if cached is not None and cached[0] > time.monotonic():
+                return dict(cached[1])
+            
             sheet = self.client.open_by_key(sheet_id)
             worksheet = sheet.get_worksheet(0)
             
@@ -126,20 +184,30 @@ class GoogleSheetsManager:
                 "col_count": getattr(worksheet, 'col_count', 0)
             }
             
-            return info
+            self._cache_sheet_info(sheet_url, info)
+            return dict(info)
             
         except Exception as e:
             logger.error(f"Error getting sheet info: {e}")
             return {"error": f"שגיאה בקבלת מידע על הגיליון: {str(e)}"}
     
+    def _cache_sheet_info(self, sheet_url: str, info: Dict[str, Any]):
+        """שמירת מידע על גיליון - פינוי רשומות שפג תוקפן ושמירה על גודל מרבי"""
+        cache = self._sheet_info_cache
+        now = time.monotonic()
+        cache.pop(sheet_url, None)
+        # לכל הרשומות אותו זמן חיים, כך שסדר ההכנסה הוא גם סדר התפוגה
+        while cache and next(iter(cache.values()))[0] <= now:
+            cache.popitem(last=False)
+        while len(cache) >= SHEET_INFO_MAX_ENTRIES:
+            cache.popitem(last=False)
+        cache[sheet_url] = (now + SHEET_INFO_TTL, info)
+    
     def test_connection(self) -> bool:
         """בדיקת חיבור ל-Google Sheets"""
         try:
-            if not self.client:
-                return False
-            
-            # ניסיון לפתוח גיליון לדוגמה (לא באמת נפתח)
-            return True
+            # תוצאת האימות נשמרת פעם אחת ב-_authenticate
+            return self._client_ok
             
         except Exception as e:
             logger.error(f"Google Sheets connection test failed: {e}")
@@ -151,23 +219,19 @@ class GoogleSheetsManager:
             if not self.client:
                 return []
             
-            # קבלת כל הגיליונות שהחשבון השירות יכול לגשת אליהם
-            sheets = self.client.openall()
-            
-            available_sheets = []
-            for sheet in sheets:
-                try:
-                    # בדיקה אם הגיליון נגיש
-                    worksheet = sheet.get_worksheet(0)
-                    if worksheet:
-                        available_sheets.append({
-                            "title": sheet.title,
-                            "url": sheet.url,
-                            "created": sheet.created,
-                            "updated": sheet.updated
-                        })
-                except:
-                    continue
+            # רשימת הגיליונות שהחשבון השירות יכול לגשת אליהם - קריאת Drive אחת,
+            # בלי לפתוח כל גיליון בנפרד (openall + get_worksheet לכל גיליון)
+            files = self.client.list_spreadsheet_files()
+            
+            available_sheets = [
+                {
+                    "title": file["name"],
+                    "url": SPREADSHEET_DRIVE_URL % file["id"],
+                    "created": file.get("createdTime"),
+                    "updated": file.get("modifiedTime")
+                }
+                for file in files
+            ]
             
             return available_sheets
             
@@ -178,14 +242,7 @@ class GoogleSheetsManager:
     def is_valid_sheet_url(self, url: str) -> bool:
         """בדיקה אם הקישור הוא קישור Google Sheets תקין"""
         try:
-            # בדיקת דפוסים נפוצים של Google Sheets
-            valid_patterns = [
-                r'https://docs\.google\.com/spreadsheets/d/',
-                r'https://docs\.google\.com/spreadsheets/',
-                r'spreadsheets/d/'
-            ]
-            
-            return any(re.search(pattern, url) for pattern in valid_patterns)
+            return _VALID_SHEET_RE.search(url) is not None
             
         except Exception as e:
             logger.error(f"Error validating sheet URL: {e}")
@@ -5,8 +5,18 @@ Default language from REPORT_LANG environment variable
 """
 
 import os
+import sys
 import logging
-from typing import Optional, Dict, Any
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from string import Formatter
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Callable, List, Mapping, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
 
 logger = logging.getLogger(__name__)
 
@@ -148,7 +158,7 @@ HEBREW_TEXTS = {
     "data_quality_excellent": "🌟 איכות נתונים מעולה (90-100) - הנתונים מוכנים לכל סוג ניתוח",
     "data_quality_good": "✅ איכות נתונים טובה (70-89) - הנתונים מתאימים לרוב סוגי הניתוח",
     "data_quality_fair": "⚠️ איכות נתונים בינונית (50-69) - נדרש טיפול בבעיות איכות לפני ניתוח מתקדם",
-    "data_quality_poor": "❌ איכות נתונים נמוכה (מתחת ל-50) - נדרש טיפול מקיף לפני כל ניתוח"
+    "data_quality_poor": "❌ איכות נתונים נמוכה (מתחת ל-50) - נדרש טיפול מקיף לפני כל ניתוח",
     
     # Error messages
     "error_no_data": "❌ אין נתונים לעיבוד",
@@ -182,10 +192,57 @@ ENGLISH_TEXTS = {
     "processing_complete": "✅ Processing completed successfully",
 }
 
+# Short values are generic terms repeated across keys and modules
+_INTERN_MAX_LEN = 24
+
+
+def _freeze_texts(texts: Dict[str, str]) -> Mapping[str, str]:
+    """Intern keys and short values, and return a read-only view"""
+    return MappingProxyType({
+        sys.intern(k): sys.intern(v) if len(v) < _INTERN_MAX_LEN else v
+        for k, v in texts.items()
+    })
+
+
+HEBREW_TEXTS = _freeze_texts(HEBREW_TEXTS)
+ENGLISH_TEXTS = _freeze_texts(ENGLISH_TEXTS)
+
+# Primary texts merged over their fallback, so a lookup is a single dict get;
+# unknown languages use English first
+_MERGED_BY_LANG = {
+    'he': {**ENGLISH_TEXTS, **HEBREW_TEXTS},
+    'en': {**HEBREW_TEXTS, **ENGLISH_TEXTS},
+}
+_MERGED_DEFAULT = _MERGED_BY_LANG['en']
+
+
+# Environment settings, read once on first use (see _reset_env_cache)
+_DEFAULT_LANG: Optional[str] = None
+_TZ_NAME: Optional[str] = None
+_TZ: Optional[tzinfo] = None
+_TZ_RESOLVED = False
+
+
+def _reset_env_cache() -> None:
+    """Forget cached REPORT_LANG / REPORT_TZ values (for tests)"""
+    global _DEFAULT_LANG, _TZ_NAME, _TZ, _TZ_RESOLVED, _FAST
+    _DEFAULT_LANG = None
+    _TZ_NAME = None
+    _TZ = None
+    _TZ_RESOLVED = False
+    _FAST = _MERGED_BY_LANG.get(get_default_language(), _MERGED_DEFAULT)
+
 
 def get_default_language() -> str:
     """Get default language from environment variable"""
-    return os.getenv('REPORT_LANG', 'he')
+    global _DEFAULT_LANG
+    if _DEFAULT_LANG is None:
+        _DEFAULT_LANG = os.getenv('REPORT_LANG', 'he')
+    return _DEFAULT_LANG
+
+
+# Merged texts for the default language, for plain t(key) lookups
+_FAST = _MERGED_BY_LANG.get(get_default_language(), _MERGED_DEFAULT)
 
 
 def t(key: str, lang: Optional[str] = None, **kwargs) -> str:
@@ -201,23 +258,35 @@ def t(key: str, lang: Optional[str] = None, **kwargs) -> str:
         Translated text with formatting applied
     """
     if lang is None:
+        if not kwargs:
+            return _FAST.get(key, key)
         lang = get_default_language()
     
-    # Select text dictionary based on language
-    if lang == 'he':
-        texts = HEBREW_TEXTS
-        fallback_texts = ENGLISH_TEXTS
-    else:
-        texts = ENGLISH_TEXTS
-        fallback_texts = HEBREW_TEXTS
-    
-    # Get text, fallback to English if not found, then to key itself
-    text = texts.get(key, fallback_texts.get(key, key))
+    # Results are pure in (key, lang, kwargs), so serve them from the cache.
+    # Value types are part of the key so that 1, 1.0 and True stay distinct;
+    # unhashable format arguments fall back to the uncached path
+    kwargs_items = tuple((name, value, type(value)) for name, value in sorted(kwargs.items()))
+    try:
+        return _t_cached(key, lang, kwargs_items)
+    except TypeError:
+        return _translate(key, lang, kwargs)
+
+
+@lru_cache(maxsize=4096)
+def _t_cached(key: str, lang: str, kwargs_items: tuple) -> str:
+    """Cached translation lookup keyed by the sorted format arguments"""
+    return _translate(key, lang, {name: value for name, value, _ in kwargs_items})
+
+
+def _translate(key: str, lang: str, kwargs: Dict[str, Any]) -> str:
+    """Look up and format a translation without caching"""
+    # Get text in the requested language, fall back to the other language, then to the key itself
+    text = _MERGED_BY_LANG.get(lang, _MERGED_DEFAULT).get(key, key)
     
     # Apply formatting if kwargs provided
     if kwargs:
         try:
-            text = text.format(**kwargs)
+            text = _compiled_template(text)(kwargs)
         except (KeyError, ValueError) as e:
             logger.warning(f"Error formatting text key '{key}': {e}")
             # Return unformatted text on error
@@ -225,28 +294,64 @@ def t(key: str, lang: Optional[str] = None, **kwargs) -> str:
     return text
 
 
+# Parsed format templates: template text -> renderer taking the kwargs dict
+_FORMAT_CACHE: Dict[str, Callable[[Dict[str, Any]], str]] = {}
+
+
+def _compiled_template(text: str) -> Callable[[Dict[str, Any]], str]:
+    """Parse a str.format template once and return a renderer for it"""
+    render = _FORMAT_CACHE.get(text)
+    if render is None:
+        render = _compile_template(text)
+        _FORMAT_CACHE[text] = render
+    return render
+
+
+def _compile_template(text: str) -> Callable[[Dict[str, Any]], str]:
+    """Turn a template into a list of (literal, field, spec) parts"""
+    parts: List[Tuple[str, Optional[str], str]] = []
+    for literal, field, spec, conversion in Formatter().parse(text):
+        # Positional, attribute/index or converted fields keep str.format semantics
+        if field is not None and (not field.isidentifier() or conversion or '{' in spec):
+            return lambda kwargs: text.format(**kwargs)
+        parts.append((literal, field, spec or ''))
+    
+    def render(kwargs: Dict[str, Any]) -> str:
+        return ''.join(
+            literal if field is None else literal + format(kwargs[field], spec)
+            for literal, field, spec in parts
+        )
+    
+    return render
+
+
 def get_timezone() -> str:
     """Get report timezone from environment variable"""
-    return os.getenv('REPORT_TZ', 'Asia/Jerusalem')
+    global _TZ_NAME
+    if _TZ_NAME is None:
+        _TZ_NAME = os.getenv('REPORT_TZ', 'Asia/Jerusalem')
+    return _TZ_NAME
+
+
+def _get_tz() -> Optional[tzinfo]:
+    """Report timezone, resolved once; None means the system timezone"""
+    global _TZ, _TZ_RESOLVED
+    if not _TZ_RESOLVED:
+        tz_name = get_timezone()
+        try:
+            _TZ = ZoneInfo(tz_name) if ZoneInfo is not None else None
+        except Exception:
+            # Fallback to system timezone
+            logger.debug(f"Could not use timezone {tz_name}, using system timezone")
+            _TZ = None
+        _TZ_RESOLVED = True
+    return _TZ
 
 
 def format_date_time(dt=None) -> str:
     """Format datetime according to Hebrew conventions (DD/MM/YYYY HH:MM)"""
     if dt is None:
-        from datetime import datetime
-        try:
-            # Try to use specified timezone
-            tz_name = get_timezone()
-            try:
-                from zoneinfo import ZoneInfo
-                tz = ZoneInfo(tz_name)
-                dt = datetime.now(tz)
-            except (ImportError, Exception):
-                # Fallback to system timezone
-                logger.debug(f"Could not use timezone {tz_name}, using system timezone")
-                dt = datetime.now()
-        except Exception:
-            dt = datetime.now()
+        dt = datetime.now(_get_tz())
     
     return dt.strftime("%d/%m/%Y %H:%M")
 
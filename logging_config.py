@@ -4,13 +4,14 @@ Centralized logging configuration with rate limiting
 Reduces noisy third-party loggers and honors environment variables
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
 import time
 import threading
-from typing import Dict, Optional
-from collections import defaultdict, deque
+from typing import Optional
+from collections import Counter
 
 
 class TokenBucketRateLimiter:
@@ -27,22 +28,21 @@ class TokenBucketRateLimiter:
         self.max_rate = max_rate
         self.bucket_size = bucket_size or (max_rate * 2)
         self.tokens = self.bucket_size
-        self.last_update = time.time()
+        self.last_update = time.monotonic()
         self.lock = threading.Lock()
     
     def allow_message(self) -> bool:
         """Check if a message should be allowed through"""
+        # Read the clock outside the lock to keep the critical section short
+        now = time.monotonic()
+        
         with self.lock:
-            now = time.time()
+            # Add tokens based on time passed (a thread that read the clock
+            # earlier than the last update adds nothing)
             time_passed = now - self.last_update
-            
-            # Add tokens based on time passed
-            self.tokens = min(
-                self.bucket_size,
-                self.tokens + time_passed * self.max_rate
-            )
-            
-            self.last_update = now
+            if time_passed > 0:
+                self.tokens = min(self.bucket_size, self.tokens + time_passed * self.max_rate)
+                self.last_update = now
             
             # Check if we have a token available
             if self.tokens >= 1:
@@ -57,49 +57,41 @@ class RateLimitingFilter(logging.Filter):
     
     def __init__(self, max_rate: float = 100.0):
         super().__init__()
-        self.rate_limiter = TokenBucketRateLimiter(max_rate)
+        # A non-positive rate disables limiting; no bucket is allocated
+        self.rate_limiter = TokenBucketRateLimiter(max_rate) if max_rate > 0 else None
         self.dropped_count = 0
     
     def filter(self, record: logging.LogRecord) -> bool:
         """Filter log records based on rate limit"""
-        if self.rate_limiter.allow_message():
-            # If we had dropped messages, add a note about it
-            if self.dropped_count > 0:
-                record.msg = f"[{self.dropped_count} messages dropped] {record.msg}"
-                self.dropped_count = 0
+        if self.rate_limiter is None:
             return True
-        else:
+        
+        if not self.rate_limiter.allow_message():
             self.dropped_count += 1
             return False
-
-
-class SuppressingFilter(logging.Filter):
-    """Filter to suppress noisy third-party loggers"""
-    
-    def __init__(self, suppress_patterns: Dict[str, int]):
-        """
-        Initialize suppressing filter
-        
-        Args:
-            suppress_patterns: Dict mapping logger names to minimum log levels
-        """
-        super().__init__()
-        self.suppress_patterns = suppress_patterns
-    
-    def filter(self, record: logging.LogRecord) -> bool:
-        """Filter records based on suppression patterns"""
-        for pattern, min_level in self.suppress_patterns.items():
-            if record.name.startswith(pattern):
-                return record.levelno >= min_level
         
+        # If we had dropped messages, add a note about it
+        dropped = self.dropped_count
+        if dropped:
+            self.dropped_count = 0
+            record.msg = "[%d messages dropped] %s" % (dropped, record.msg)
         return True
 
 
+# Set once setup_logging() has installed the handlers
+_CONFIGURED = False
+
+
 def setup_logging():
     """
     Configure logging with rate limiting and third-party suppression
     Honors environment variables for configuration
+    Repeated calls return the already configured root logger
     """
+    global _CONFIGURED
+    if _CONFIGURED:
+        return logging.getLogger()
+    
     # Get configuration from environment
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
     logs_max_per_sec = float(os.getenv('LOGS_MAX_PER_SEC', '100'))
@@ -153,18 +145,14 @@ def setup_logging():
     if not uvicorn_access_log:
         suppress_patterns['uvicorn.access'] = logging.CRITICAL
     
-    # Add suppression filter
-    suppression_filter = SuppressingFilter(suppress_patterns)
-    console_handler.addFilter(suppression_filter)
+    # Native logger levels gate the noisy loggers and their children before a
+    # record is even created; never lower them below the configured level
+    for logger_name, min_level in suppress_patterns.items():
+        logging.getLogger(logger_name).setLevel(max(min_level, numeric_level))
     
     # Add handler to root logger
     root_logger.addHandler(console_handler)
     
-    # Set specific logger levels for known noisy modules
-    for logger_name, min_level in suppress_patterns.items():
-        logger = logging.getLogger(logger_name)
-        logger.setLevel(min_level)
-    
     # Ensure our application loggers have appropriate levels
     app_loggers = [
         'pdf_report',
@@ -185,16 +173,26 @@ def setup_logging():
     main_logger.info(f"Logging configured - Level: {log_level}, Rate limit: {logs_max_per_sec}/sec")
     main_logger.debug(f"Suppression patterns: {list(suppress_patterns.keys())}")
     
+    _CONFIGURED = True
     return root_logger
 
 
+def reconfigure_logging(force: bool = True):
+    """
+    Rebuild the logging configuration (e.g. after changing environment variables in tests)
+    """
+    global _CONFIGURED
+    if force:
+        _CONFIGURED = False
+    return setup_logging()
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with the specified name
     Ensures logging is configured if not already done
     """
-    # Check if root logger has handlers (i.e., logging is configured)
-    if not logging.getLogger().handlers:
+    if not _CONFIGURED:
         setup_logging()
     
     return logging.getLogger(name)
@@ -205,36 +203,66 @@ class PeriodicReporter:
     
     def __init__(self, report_interval: float = 300.0):  # 5 minutes
         self.report_interval = report_interval
-        self.last_report = time.time()
-        self.message_counts = defaultdict(int)
+        # Standard levels are pre-seeded so increments are plain updates
+        self.message_counts = Counter(dict.fromkeys(
+            (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL), 0
+        ))
         self.lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
     
-    def record_message(self, level: str):
+    def record_message(self, level: int):
         """Record a message for statistics"""
+        # Counting is lock-free; an occasional lost increment is fine for statistics
+        self.message_counts[level] += 1
+    
+    def start(self):
+        """Start the background timer that reports every interval"""
         with self.lock:
-            self.message_counts[level] += 1
-            
-            # Check if it's time to report
-            now = time.time()
-            if now - self.last_report >= self.report_interval:
-                self._report_stats()
-                self.message_counts.clear()
-                self.last_report = now
-    
-    def _report_stats(self):
+            if self._timer is None:
+                self._schedule()
+    
+    def stop(self):
+        """Cancel the background timer"""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+    
+    def _schedule(self):
+        """Arm the next report; called with the lock held"""
+        self._timer = threading.Timer(self.report_interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _tick(self):
+        """Timer callback: snapshot the counts, report them and reschedule"""
+        with self.lock:
+            if self._timer is None:
+                return
+            counts = self.message_counts.copy()
+            for level in counts:
+                self.message_counts[level] = 0
+            self._schedule()
+        
+        # Report outside the lock - the report itself is a log record
+        self._report_stats(counts)
+    
+    def _report_stats(self, counts: Counter):
         """Report logging statistics"""
-        if not self.message_counts:
+        counts = +counts  # drop levels with no messages
+        if not counts:
             return
             
         logger = logging.getLogger(__name__)
-        total = sum(self.message_counts.values())
+        total = sum(counts.values())
         logger.info(f"Logging stats (last {self.report_interval/60:.1f}min): "
                    f"Total={total}, " +
-                   ", ".join(f"{level}={count}" for level, count in self.message_counts.items()))
+                   ", ".join(f"{logging.getLevelName(level)}={count}" for level, count in counts.items()))
 
 
 # Global reporter instance
 _reporter = PeriodicReporter()
+atexit.register(_reporter.stop)
 
 
 class StatsLoggingHandler(logging.Handler):
@@ -242,7 +270,7 @@ class StatsLoggingHandler(logging.Handler):
     
     def emit(self, record: logging.LogRecord):
         """Record statistics for the log record"""
-        _reporter.record_message(record.levelname)
+        _reporter.record_message(record.levelno)
 
 
 def add_stats_reporting():
@@ -252,6 +280,9 @@ def add_stats_reporting():
     
     root_logger = logging.getLogger()
     root_logger.addHandler(stats_handler)
+    
+    # Reports come from a background timer, so emit() only counts
+    _reporter.start()
 
 
 # Initialize logging when module is imported
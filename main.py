@@ -7,33 +7,182 @@
 from logging_config import setup_logging
 logger = setup_logging()
 
+import codecs
 import os
 import pandas as pd
-from telegram import Update, ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
-from telegram.ext import Updater, CommandHandler, MessageHandler, CallbackQueryHandler, CallbackContext, Filters
+from telegram import Update, ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, Defaults, filters
+from telegram.request import HTTPXRequest
 import asyncio
-from typing import Dict, Any, Optional
+import functools
+import multiprocessing
+import threading
+import time
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Optional, DefaultDict, BinaryIO, Tuple, List
 import tempfile
-import shutil
 
 # Import our modules
 from config import HEBREW_TEXTS, SUPPORTED_FORMATS, MAX_FILE_SIZE
 from database import DatabaseManager
+from session_store import SessionStore
+from bot_rate_limiter import BotRateLimiter
 from google_sheets import get_google_sheets_manager
-from data_analysis import DataAnalyzer
+from data_analysis import DataAnalyzer, ColumnStats
 from visualization import get_chart_generator
-from pdf_report import generate_complete_data_report
+from pdf_report import generate_complete_data_report, init_pdf_worker
 
 logger.info("Hebrew Data Analytics Bot starting with guaranteed PDF content generation")
 
+# קידודים אפשריים לקבצי CSV לפי סדר עדיפות - latin-1 מפענח כל רצף בתים ולכן אחרון
+CSV_ENCODINGS = ('utf-8-sig', 'cp1255', 'latin-1')
+
+# כמות הבתים מתחילת הקובץ שלפיה נקבע הקידוד
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# קבצים מועלים עד לגודל זה נשמרים בזיכרון בלבד, גדולים יותר נכתבים לקובץ זמני
+IN_MEMORY_UPLOAD_LIMIT = 32 * 1024 * 1024
+
+# תהליכונים לעבודה חוסמת (pandas, תרשימים, PDF) - לולאת האירועים נשארת פנויה לשאר המשתמשים
+_BLOCKING_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix='blocking')
+
+# pyplot משתמש במצב גלובלי ואינו בטוח לתהליכונים - יצירת תרשימים ו-PDF רצה אחת בכל פעם
+_PLOT_LOCK = threading.Lock()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """הרצת פעולה חוסמת בתהליכון נפרד והמתנה לתוצאה"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_BLOCKING_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+# תהליכים נפרדים ליצירת דוחות PDF - עבודת CPU כבדה שרצה במקביל על כל הליבות.
+# spawn - תהליך חדש ונקי, בלי נעילות של תהליכונים שהועתקו מהבוט
+_PDF_EXECUTOR = ProcessPoolExecutor(
+    max_workers=os.cpu_count(),
+    mp_context=multiprocessing.get_context('spawn'),
+    initializer=init_pdf_worker,
+)
+
+
+async def run_in_pdf_process(func, *args, **kwargs):
+    """הרצת יצירת דוח בתהליך נפרד והמתנה לתוצאה"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PDF_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+def _with_plot_lock(func, *args, **kwargs):
+    """הרצת פעולה שמשתמשת ב-pyplot תחת _PLOT_LOCK"""
+    with _PLOT_LOCK:
+        return func(*args, **kwargs)
+
+
+# מאגר החיבורים לשליחת הודעות ל-Telegram - חיבורים פתוחים משמשים שוב בין בקשות
+BOT_CONNECTION_POOL_SIZE = 256
+BOT_POOL_TIMEOUT = 5.0
+BOT_READ_TIMEOUT = 20.0
+BOT_WRITE_TIMEOUT = 20.0
+
+# getUpdates רץ בקשה אחת בכל פעם ומקבל מאגר חיבורים נפרד
+GET_UPDATES_POOL_SIZE = 2
+
+# זמן (בשניות) שאחריו נעילה של צ'אט לא פעיל נמחקת מהזיכרון
+CHAT_LOCK_IDLE = 600.0
+
+# מספר התרשימים המוכנים שנשמרים לשימוש חוזר (לפי תוכן הנתונים וסוג התרשים)
+CHART_CACHE_SIZE = 256
+
+# מספר תוצאות הניתוח שנשמרות לפי טביעת האצבע של הנתונים
+ANALYSIS_CACHE_SIZE = 32
+
+# תור הכתיבות למסד הנתונים - גודל מרבי ומספר הכתיבות בטרנזקציה אחת
+DB_QUEUE_SIZE = 10000
+DB_BATCH_SIZE = 100
+
+
+def per_chat_serialized(handler):
+    """עדכונים מאותו צ'אט מטופלים לפי סדר הגעתם, צ'אטים שונים - במקביל"""
+    @functools.wraps(handler)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        chat = update.effective_chat
+        if chat is None:
+            return await handler(self, update, context, *args, **kwargs)
+        
+        now = time.monotonic()
+        if now - self._chat_locks_pruned >= CHAT_LOCK_IDLE:
+            self._prune_chat_locks(now)
+        self._chat_lock_seen[chat.id] = now
+        
+        async with self._chat_locks[chat.id]:
+            return await handler(self, update, context, *args, **kwargs)
+    
+    return wrapper
+
+
+def data_fingerprint(df: pd.DataFrame) -> Optional[int]:
+    """טביעת אצבע של תוכן הטבלה - טבלאות זהות מקבלות אותו ערך, None אם אי אפשר לחשב"""
+    try:
+        content_hash = int(pd.util.hash_pandas_object(df, index=True).sum())
+    except TypeError:
+        # ערכים שאינם ניתנים לגיבוב (למשל רשימות בתוך תאים)
+        return None
+    return hash((df.shape, tuple(df.columns), content_hash))
+
+
+def detect_encoding(data: BinaryIO) -> str:
+    """בחירת הקידוד הראשון שמפענח את תחילת הקובץ ללא שגיאות - המיקום בקובץ חוזר להתחלה"""
+    sample = data.read(ENCODING_SAMPLE_SIZE)
+    data.seek(0)
+    
+    for encoding in CSV_ENCODINGS:
+        try:
+            # final=False - תו מרובה בתים שנחתך בסוף הדגימה אינו שגיאה
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    
+    return CSV_ENCODINGS[-1]
+
+
 class HebrewDataAnalyticsBot:
     def __init__(self, bot_token: str = None):
         self.db = DatabaseManager()
         self.google_sheets = get_google_sheets_manager()
         self.chart_generator = get_chart_generator()
         
-        # User sessions storage
-        self.user_sessions: Dict[int, Dict[str, Any]] = {}
+        # User sessions storage - idle sessions expire automatically
+        self.sessions = SessionStore()
+        
+        # Per-chat locks keep updates from one chat in order
+        self._chat_locks: DefaultDict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._chat_lock_seen: Dict[int, float] = {}
+        self._chat_locks_pruned = time.monotonic()
+        
+        # Rendered charts by (data fingerprint, chart type, columns) - identical requests reuse the PNG
+        self._chart_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        # Analysis results by data fingerprint - unchanged data is not analyzed twice
+        self._analysis_cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        
+        # The keyboards never change - build them and the button dispatch once
+        self._main_menu_kb = self._build_main_menu_keyboard()
+        self._chart_kb = self._build_chart_selection_keyboard()
+        buttons = HEBREW_TEXTS['buttons']
+        self._menu_dispatch = {
+            buttons['upload_file']: self.handle_upload_file_request,
+            buttons['google_sheets']: self.handle_google_sheets_request,
+            buttons['analyze_data']: self.handle_analyze_data_request,
+            buttons['show_charts']: self.handle_show_charts_request,
+            buttons['generate_pdf']: self.handle_generate_pdf_request,
+            buttons['ask_question']: self.handle_ask_question_request,
+        }
+        # טיפול בכפתורי inline לפי הקידומת של callback_data (chart_bar -> 'chart', 'bar')
+        self._cb_dispatch = {
+            'chart': self.handle_chart_creation,
+            'back': self.handle_back_to_menu,
+        }
         
         # Get token from environment or parameter
         if bot_token is None:
@@ -42,50 +191,117 @@ class HebrewDataAnalyticsBot:
         if not bot_token:
             raise ValueError("BOT_TOKEN not found! Please set BOT_TOKEN environment variable or pass it as parameter.")
         
-        # Initialize bot
-        self.updater = Updater(token=bot_token, use_context=True)
-        self.dispatcher = self.updater.dispatcher
+        # Initialize bot - updates from different chats are handled concurrently
+        self.application = (
+            Application.builder()
+            .token(bot_token)
+            .request(HTTPXRequest(
+                connection_pool_size=BOT_CONNECTION_POOL_SIZE,
+                pool_timeout=BOT_POOL_TIMEOUT,
+                read_timeout=BOT_READ_TIMEOUT,
+                write_timeout=BOT_WRITE_TIMEOUT,
+            ))
+            .get_updates_request(HTTPXRequest(connection_pool_size=GET_UPDATES_POOL_SIZE))
+            .rate_limiter(BotRateLimiter())
+            .concurrent_updates(True)
+            .defaults(Defaults(block=False))
+            .post_init(self._start_background_tasks)
+            .post_shutdown(self._stop_background_tasks)
+            .build()
+        )
+        
+        # Database writes that the user does not wait for - drained in batches by a background task
+        self._db_queue: asyncio.Queue = asyncio.Queue(maxsize=DB_QUEUE_SIZE)
+        self._background_tasks: List[asyncio.Task] = []
         self.setup_handlers()
     
     def setup_handlers(self):
         """הגדרת כל ה-handlers של הבוט"""
         # Command handlers
-        self.dispatcher.add_handler(CommandHandler("start", self.start_command))
-        self.dispatcher.add_handler(CommandHandler("help", self.help_command))
-        self.dispatcher.add_handler(CommandHandler("menu", self.show_main_menu))
+        self.application.add_handler(CommandHandler("start", self.start_command))
+        self.application.add_handler(CommandHandler("help", self.help_command))
+        self.application.add_handler(CommandHandler("menu", self.show_main_menu))
         
         # Message handlers
-        self.dispatcher.add_handler(MessageHandler(Filters.text & ~Filters.command, self.handle_text_message))
-        self.dispatcher.add_handler(MessageHandler(Filters.document, self.handle_document))
+        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text_message))
+        self.application.add_handler(MessageHandler(filters.Document.ALL, self.handle_document))
         
         # Callback query handlers
-        self.dispatcher.add_handler(CallbackQueryHandler(self.handle_callback_query))
+        self.application.add_handler(CallbackQueryHandler(self.handle_callback_query))
+    
+    def _prune_chat_locks(self, now: float):
+        """מחיקת נעילות של צ'אטים שלא היו פעילים מעל CHAT_LOCK_IDLE שניות"""
+        self._chat_locks_pruned = now
+        for chat_id, seen in list(self._chat_lock_seen.items()):
+            lock = self._chat_locks.get(chat_id)
+            if now - seen > CHAT_LOCK_IDLE and (lock is None or not lock.locked()):
+                self._chat_locks.pop(chat_id, None)
+                del self._chat_lock_seen[chat_id]
+    
+    async def _start_background_tasks(self, application: Application):
+        """הפעלת משימות הרקע - מחיקת סשנים לא פעילים וכתיבה למסד הנתונים"""
+        self._background_tasks = [
+            asyncio.create_task(self._sweep_sessions()),
+            asyncio.create_task(self._db_worker()),
+        ]
     
-    def start_command(self, update: Update, context: CallbackContext):
+    async def _stop_background_tasks(self, application: Application):
+        """עצירת משימות הרקע בכיבוי הבוט וכתיבת מה שנשאר בתור ובזמני הפעילות"""
+        for task in self._background_tasks:
+            task.cancel()
+        self._background_tasks = []
+        
+        pending = []
+        while not self._db_queue.empty():
+            pending.append(self._db_queue.get_nowait())
+        await self.db.run_async(self.db.apply_batch, pending)
+        # זמני הפעילות שעוד ממתינים לטיימר של מסד הנתונים
+        await self.db.run_async(self.db.flush_user_activity)
+    
+    def _queue_db_write(self, kind: str, *args):
+        """הוספת כתיבה לתור מסד הנתונים בלי להמתין לה"""
+        try:
+            self._db_queue.put_nowait((kind, args))
+        except asyncio.QueueFull:
+            logger.error(f"Database write queue is full, dropping {kind} write")
+    
+    async def _db_worker(self):
+        """כתיבת הפעולות מהתור בקבוצות - טרנזקציה אחת לכל מה שהצטבר"""
+        while True:
+            batch = [await self._db_queue.get()]
+            while len(batch) < DB_BATCH_SIZE and not self._db_queue.empty():
+                batch.append(self._db_queue.get_nowait())
+            
+            try:
+                await self.db.run_async(self.db.apply_batch, batch)
+            except Exception as e:
+                logger.error(f"Error writing database batch: {e}")
+    
+    async def _sweep_sessions(self):
+        """מחיקת סשנים לא פעילים (והקבצים שלהם) כל sweep_interval שניות, גם בלי פניות חדשות"""
+        while True:
+            await asyncio.sleep(self.sessions.sweep_interval)
+            try:
+                await run_blocking(self.sessions.evict_expired)
+            except Exception as e:
+                logger.error(f"Error sweeping sessions: {e}")
+    
+    @per_chat_serialized
+    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בפקודת /start"""
         user = update.effective_user
         
         # הוספת משתמש למסד הנתונים
-        self.db.add_user(
-            user_id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name
-        )
+        self._queue_db_write('user', user.id, user.username, user.first_name, user.last_name)
         
         # יצירת סשן משתמש
-        self.user_sessions[user.id] = {
-            'state': 'main_menu',
-            'data': None,
-            'analysis_results': None,
-            'chart_files': []
-        }
+        self.sessions.reset(user.id)
         
         # שליחת הודעת פתיחה
         welcome_text = HEBREW_TEXTS['welcome']
-        update.message.reply_text(welcome_text, reply_markup=self.get_main_menu_keyboard())
+        await update.message.reply_text(welcome_text, reply_markup=self.get_main_menu_keyboard())
     
-    def help_command(self, update: Update, context: CallbackContext):
+    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בפקודת /help"""
         help_text = """
 📚 **עזרה - בוט ניתוח נתונים בעברית**
@@ -106,16 +322,21 @@ class HebrewDataAnalyticsBot:
 
 **לשאלות נוספות, פנה למפתח הבוט.**
         """
-        update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
+        await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
     
-    def show_main_menu(self, update: Update, context: CallbackContext):
+    async def show_main_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """הצגת התפריט הראשי"""
-        update.message.reply_text(
+        await update.message.reply_text(
             HEBREW_TEXTS['main_menu'],
             reply_markup=self.get_main_menu_keyboard()
         )
     
     def get_main_menu_keyboard(self):
+        """מקלדת התפריט הראשי - נבנית פעם אחת ומשותפת לכל המשתמשים"""
+        return self._main_menu_kb
+    
+    @staticmethod
+    def _build_main_menu_keyboard():
         """יצירת מקלדת התפריט הראשי"""
         keyboard = [
             [HEBREW_TEXTS['buttons']['upload_file']],
@@ -128,6 +349,11 @@ class HebrewDataAnalyticsBot:
         return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
     
     def get_chart_selection_keyboard(self):
+        """מקלדת בחירת סוג תרשים - נבנית פעם אחת ומשותפת לכל המשתמשים"""
+        return self._chart_kb
+    
+    @staticmethod
+    def _build_chart_selection_keyboard():
         """יצירת מקלדת בחירת סוג תרשים"""
         keyboard = []
         row = []
@@ -142,7 +368,8 @@ class HebrewDataAnalyticsBot:
         keyboard.append([InlineKeyboardButton(HEBREW_TEXTS['buttons']['back_to_menu'], callback_data="back_to_menu")])
         return InlineKeyboardMarkup(keyboard)
     
-    def handle_text_message(self, update: Update, context: CallbackContext):
+    @per_chat_serialized
+    async def handle_text_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בהודעות טקסט"""
         user_id = update.effective_user.id
         text = update.message.text
@@ -150,58 +377,38 @@ class HebrewDataAnalyticsBot:
         # עדכון פעילות משתמש
         self.db.update_user_activity(user_id)
         
-        # בדיקה אם המשתמש קיים בסשנים
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {
-                'state': 'main_menu',
-                'data': None,
-                'analysis_results': None,
-                'chart_files': []
-            }
-        
-        session = self.user_sessions[user_id]
+        # סשן המשתמש - נוצר מחדש אם אין או שפג תוקפו
+        session = self.sessions.get(user_id)
         
         # טיפול לפי המצב הנוכחי
         if session['state'] == 'waiting_for_sheets_url':
-            self.handle_sheets_url(update, context, text)
+            await self.handle_sheets_url(update, context, text)
         elif session['state'] == 'waiting_for_question':
-            self.handle_natural_language_question(update, context, text)
+            await self.handle_natural_language_question(update, context, text)
         else:
             # טיפול בכפתורים מהתפריט
-            self.handle_menu_selection(update, context, text)
+            await self.handle_menu_selection(update, context)
     
-    def handle_menu_selection(self, update: Update, context: CallbackContext):
+    async def handle_menu_selection(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בבחירת תפריט"""
-        user_id = update.effective_user.id
-        text = update.message.text
-        
-        if text == HEBREW_TEXTS['buttons']['upload_file']:
-            update.message.reply_text(HEBREW_TEXTS['upload_file'])
-            update.message.reply_text(
-                "📁 שלח לי קובץ CSV או Excel, או הכנס קישור לגיליון Google Sheets"
-            )
-        
-        elif text == HEBREW_TEXTS['buttons']['google_sheets']:
-            self.handle_google_sheets_request(update, context)
-        
-        elif text == HEBREW_TEXTS['buttons']['analyze_data']:
-            self.handle_analyze_data_request(update, context)
-        
-        elif text == HEBREW_TEXTS['buttons']['show_charts']:
-            self.handle_show_charts_request(update, context)
-        
-        elif text == HEBREW_TEXTS['buttons']['generate_pdf']:
-            self.handle_generate_pdf_request(update, context)
-        
-        elif text == HEBREW_TEXTS['buttons']['ask_question']:
-            self.handle_ask_question_request(update, context)
+        handler = self._menu_dispatch.get(update.message.text)
         
+        if handler is not None:
+            await handler(update, context)
         else:
-            update.message.reply_text(
+            await update.message.reply_text(
                 "לא הבנתי את הבחירה שלך. אנא השתמש בכפתורים מהתפריט.",
                 reply_markup=self.get_main_menu_keyboard()
             )
     
+    async def handle_upload_file_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """טיפול בבקשת העלאת קובץ"""
+        await update.message.reply_text(HEBREW_TEXTS['upload_file'])
+        await update.message.reply_text(
+            "📁 שלח לי קובץ CSV או Excel, או הכנס קישור לגיליון Google Sheets"
+        )
+    
+    @per_chat_serialized
     async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בקבצים שהועלו"""
         user_id = update.effective_user.id
@@ -227,34 +434,28 @@ class HebrewDataAnalyticsBot:
         await update.message.reply_text(HEBREW_TEXTS['file_received'])
         
         try:
-            # הורדת הקובץ
+            # הורדת הקובץ - נשאר בזיכרון ונכתב לדיסק רק מעל IN_MEMORY_UPLOAD_LIMIT
             file = await context.bot.get_file(document.file_id)
-            
-            # יצירת תיקייה זמנית
-            temp_dir = tempfile.mkdtemp()
-            file_path = os.path.join(temp_dir, file_name)
-            
-            # הורדת הקובץ
-            await file.download_to_drive(file_path)
-            
-            # קריאת הקובץ
-            df = await self.read_data_file(file_path, file_extension)
+            with tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_UPLOAD_LIMIT) as data:
+                await file.download_to_memory(data)
+                data.seek(0)
+                
+                # קריאת הקובץ
+                df = await run_blocking(self.read_data_file, data, file_extension)
             
             if df is not None:
-                # שמירת הנתונים בסשן
-                if user_id not in self.user_sessions:
-                    self.user_sessions[user_id] = {}
-                
-                self.user_sessions[user_id].update({
-                    'data': df,
+                # שמירת הנתונים בסשן - הטבלה עצמה נשמרת בקובץ
+                column_types = await run_blocking(self._store_data, user_id, df)
+                session = self.sessions.update(user_id, {
+                    **column_types,
                     'file_name': file_name,
-                    'file_path': file_path,
                     'analysis_results': None,
                     'chart_files': []
                 })
                 
                 # יצירת סשן במסד הנתונים
-                session_id = self.db.create_session(
+                session_id = await self.db.run_async(
+                    self.db.create_session,
                     user_id=user_id,
                     file_name=file_name,
                     file_type=file_extension,
@@ -262,11 +463,10 @@ class HebrewDataAnalyticsBot:
                 )
                 
                 if session_id:
-                    self.user_sessions[user_id]['session_id'] = session_id
+                    session['session_id'] = session_id
                 
-                await update.message.reply_text(HEBREW_TEXTS['data_ready'])
                 await update.message.reply_text(
-                    "הנתונים מוכנים לניתוח! מה תרצה לעשות?",
+                    HEBREW_TEXTS['data_ready'],
                     reply_markup=self.get_main_menu_keyboard()
                 )
             else:
@@ -275,34 +475,29 @@ class HebrewDataAnalyticsBot:
         except Exception as e:
             logger.error(f"Error handling document: {e}")
             await update.message.reply_text(HEBREW_TEXTS['processing_error'])
-        
-        finally:
-            # ניקוי תיקייה זמנית
-            if 'temp_dir' in locals():
-                shutil.rmtree(temp_dir, ignore_errors=True)
     
-    async def read_data_file(self, file_path: str, file_extension: str) -> Optional[pd.DataFrame]:
-        """קריאת קובץ נתונים"""
+    def read_data_file(self, data: BinaryIO, file_extension: str) -> Optional[pd.DataFrame]:
+        """קריאת קובץ נתונים מאובייקט קובץ בינארי - פעולה חוסמת, מורצת דרך run_blocking"""
         try:
             if file_extension == '.csv':
-                # ניסיון לקרוא עם encoding שונים
-                encodings = ['utf-8', 'latin-1', 'cp1255', 'iso-8859-8']
-                for encoding in encodings:
-                    try:
-                        df = pd.read_csv(file_path, encoding=encoding)
-                        return df
-                    except UnicodeDecodeError:
-                        continue
-                return None
+                # זיהוי הקידוד מתחילת הקובץ וקריאה אחת בלבד
+                encoding = detect_encoding(data)
+                try:
+                    return pd.read_csv(data, encoding=encoding)
+                except UnicodeDecodeError:
+                    # בתים לא תקינים אחרי הדגימה - latin-1 מפענח כל קובץ
+                    logger.warning(f"CSV is not valid {encoding} past the sample, falling back to latin-1")
+                    data.seek(0)
+                    return pd.read_csv(data, encoding='latin-1')
             
             elif file_extension in ['.xlsx', '.xls']:
-                df = pd.read_excel(file_path)
+                df = pd.read_excel(data)
                 return df
             
             return None
             
         except Exception as e:
-            logger.error(f"Error reading file {file_path}: {e}")
+            logger.error(f"Error reading {file_extension} file: {e}")
             return None
     
     async def handle_google_sheets_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -317,7 +512,7 @@ class HebrewDataAnalyticsBot:
             return
         
         # שינוי מצב המשתמש
-        self.user_sessions[user_id]['state'] = 'waiting_for_sheets_url'
+        self.sessions.get(user_id)['state'] = 'waiting_for_sheets_url'
         
         await update.message.reply_text(HEBREW_TEXTS['enter_sheets_url'])
         await update.message.reply_text(
@@ -327,6 +522,7 @@ class HebrewDataAnalyticsBot:
     async def handle_sheets_url(self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str):
         """טיפול בקישור Google Sheets"""
         user_id = update.effective_user.id
+        session = self.sessions.get(user_id)
         
         # בדיקת תקינות הקישור
         if not self.google_sheets.is_valid_sheet_url(url):
@@ -339,12 +535,13 @@ class HebrewDataAnalyticsBot:
         
         try:
             # קבלת נתונים מהגיליון
-            df, sheet_title, error = self.google_sheets.get_sheet_data(url)
+            df, sheet_title, error = await run_blocking(self.google_sheets.get_sheet_data, url)
             
             if df is not None:
-                # שמירת הנתונים בסשן
-                self.user_sessions[user_id].update({
-                    'data': df,
+                # שמירת הנתונים בסשן - הטבלה עצמה נשמרת בקובץ
+                column_types = await run_blocking(self._store_data, user_id, df)
+                session.update({
+                    **column_types,
                     'file_name': f"Google Sheets - {sheet_title}",
                     'sheets_url': url,
                     'analysis_results': None,
@@ -352,10 +549,11 @@ class HebrewDataAnalyticsBot:
                 })
                 
                 # הוספת חיבור למסד הנתונים
-                self.db.add_google_sheets_connection(user_id, url, sheet_title)
+                self._queue_db_write('sheet', user_id, url, sheet_title)
                 
                 # יצירת סשן במסד הנתונים
-                session_id = self.db.create_session(
+                session_id = await self.db.run_async(
+                    self.db.create_session,
                     user_id=user_id,
                     file_name=f"Google Sheets - {sheet_title}",
                     file_type='.sheets',
@@ -363,57 +561,58 @@ class HebrewDataAnalyticsBot:
                 )
                 
                 if session_id:
-                    self.user_sessions[user_id]['session_id'] = session_id
+                    session['session_id'] = session_id
                 
                 # החזרה למצב רגיל
-                self.user_sessions[user_id]['state'] = 'main_menu'
+                session['state'] = 'main_menu'
                 
-                await update.message.reply_text(HEBREW_TEXTS['sheets_connected'])
                 await update.message.reply_text(
-                    f"הנתונים מהגיליון '{sheet_title}' מוכנים לניתוח!",
+                    f"{HEBREW_TEXTS['sheets_connected']}\nהנתונים מהגיליון '{sheet_title}' מוכנים לניתוח!",
                     reply_markup=self.get_main_menu_keyboard()
                 )
             else:
                 await update.message.reply_text(f"❌ {error}")
-                self.user_sessions[user_id]['state'] = 'main_menu'
+                session['state'] = 'main_menu'
         
         except Exception as e:
             logger.error(f"Error handling Google Sheets: {e}")
             await update.message.reply_text(HEBREW_TEXTS['sheets_error'])
-            self.user_sessions[user_id]['state'] = 'main_menu'
+            session['state'] = 'main_menu'
     
     async def handle_analyze_data_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בבקשת ניתוח נתונים"""
         user_id = update.effective_user.id
+        session = self.sessions.get(user_id)
         
-        if user_id not in self.user_sessions or self.user_sessions[user_id].get('data') is None:
+        if session.get('data_path') is None:
             await update.message.reply_text(HEBREW_TEXTS['no_data'])
             return
         
         await update.message.reply_text(HEBREW_TEXTS['analyzing_data'])
         
         try:
-            # ניתוח הנתונים
-            df = self.user_sessions[user_id]['data']
-            analyzer = DataAnalyzer(df)
+            # נתונים שכבר נותחו (העלאה חוזרת או רענון גיליון ללא שינוי) - ללא ניתוח נוסף
+            fingerprint = session.get('data_fingerprint')
+            analysis_results = self._analysis_cache.get(fingerprint) if fingerprint is not None else None
             
-            # ניקוי הנתונים
-            clean_df = analyzer.clean_data()
-            
-            # ניתוח מקיף
-            analysis_results = analyzer.get_analysis_summary()
+            if analysis_results is None:
+                df = await run_blocking(self.sessions.load_data, user_id)
+                
+                # ניקוי וניתוח מקיף
+                analysis_results = await run_blocking(self._analyze, df)
+                if fingerprint is not None and analysis_results:
+                    self._analysis_cache[fingerprint] = analysis_results
+                    while len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                        self._analysis_cache.popitem(last=False)
+            else:
+                self._analysis_cache.move_to_end(fingerprint)
             
             # שמירת תוצאות הניתוח
-            self.user_sessions[user_id]['analysis_results'] = analysis_results
-            self.user_sessions[user_id]['clean_data'] = clean_df
+            session['analysis_results'] = analysis_results
             
             # עדכון מסד הנתונים
-            if 'session_id' in self.user_sessions[user_id]:
-                self.db.update_session_analysis(
-                    self.user_sessions[user_id]['session_id'],
-                    'comprehensive_analysis',
-                    analysis_results
-                )
+            if 'session_id' in session:
+                self._queue_db_write('analysis', session['session_id'], 'comprehensive_analysis', analysis_results)
             
             # שליחת סיכום
             summary_text = "📊 **סיכום הניתוח:**\n\n"
@@ -435,9 +634,12 @@ class HebrewDataAnalyticsBot:
                 for insight in analysis_results['insights'][:3]:  # רק 3 הראשונות
                     summary_text += f"• {insight}\n"
             
-            await update.message.reply_text(summary_text, parse_mode=ParseMode.MARKDOWN)
+            summary_text += "\nהניתוח הושלם! מה תרצה לעשות עכשיו?"
+            
+            # הסיכום והתפריט בהודעה אחת
             await update.message.reply_text(
-                "הניתוח הושלם! מה תרצה לעשות עכשיו?",
+                summary_text,
+                parse_mode=ParseMode.MARKDOWN,
                 reply_markup=self.get_main_menu_keyboard()
             )
         
@@ -445,11 +647,29 @@ class HebrewDataAnalyticsBot:
             logger.error(f"Error analyzing data: {e}")
             await update.message.reply_text(HEBREW_TEXTS['processing_error'])
     
+    def _store_data(self, user_id: int, df: pd.DataFrame) -> Dict[str, Any]:
+        """שמירת הטבלה בסשן וחישוב סוגי העמודות פעם אחת - פעולה חוסמת, מורצת דרך run_blocking"""
+        self.sessions.store_data(user_id, df)
+        return {
+            'numeric_cols': tuple(df.select_dtypes(include=['number']).columns),
+            'categorical_cols': tuple(df.select_dtypes(include=['object']).columns),
+            'numeric_means': None,
+            'col_stats': {},
+            'question_analyzer': None,
+            'data_fingerprint': data_fingerprint(df),
+        }
+    
+    def _analyze(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """ניקוי הנתונים וניתוח מקיף - פעולה חוסמת, מורצת דרך run_blocking"""
+        analyzer = DataAnalyzer(df)
+        analyzer.clean_data()
+        return analyzer.get_analysis_summary()
+    
     async def handle_show_charts_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בבקשת הצגת תרשימים"""
         user_id = update.effective_user.id
         
-        if user_id not in self.user_sessions or self.user_sessions[user_id].get('data') is None:
+        if self.sessions.get(user_id).get('data_path') is None:
             await update.message.reply_text(HEBREW_TEXTS['no_data'])
             return
         
@@ -461,8 +681,9 @@ class HebrewDataAnalyticsBot:
     async def handle_generate_pdf_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בבקשת יצירת דוח PDF"""
         user_id = update.effective_user.id
+        session = self.sessions.get(user_id)
         
-        if user_id not in self.user_sessions or self.user_sessions[user_id].get('analysis_results') is None:
+        if session.get('analysis_results') is None:
             await update.message.reply_text(
                 "❌ אין תוצאות ניתוח זמינות. אנא בצע ניתוח נתונים תחילה."
             )
@@ -471,35 +692,34 @@ class HebrewDataAnalyticsBot:
         await update.message.reply_text(HEBREW_TEXTS['generating_pdf'])
         
         try:
+            df = await run_blocking(self.sessions.load_data, user_id)
+            
             # יצירת תרשימים אם אין
-            if not self.user_sessions[user_id].get('chart_files'):
-                df = self.user_sessions[user_id]['data']
-                analysis_results = self.user_sessions[user_id]['analysis_results']
+            if not session.get('chart_files'):
+                analysis_results = session['analysis_results']
                 
-                chart_files = self.chart_generator.create_comprehensive_dashboard(df, analysis_results)
-                self.user_sessions[user_id]['chart_files'] = chart_files
+                chart_files = await run_blocking(
+                    _with_plot_lock, self.chart_generator.create_comprehensive_dashboard, df, analysis_results
+                )
+                session['chart_files'] = chart_files
             
             # יצירת הדוח PDF עם מערכת הדוח המשופרת
-            df = self.user_sessions[user_id]['data']
-            
-            pdf_path = generate_complete_data_report(
+            # הדוח חוזר כבתים מהתהליך - אין קובץ ביניים בדיסק
+            pdf_bytes = await run_in_pdf_process(
+                generate_complete_data_report,
                 df=df,
-                output_path=f"report_user_{user_id}.pdf",
-                include_charts=True
+                include_charts=True,
+                return_bytes=True
             )
             
-            if pdf_path and os.path.exists(pdf_path):
+            if pdf_bytes:
                 # שליחת הדוח
-                with open(pdf_path, 'rb') as pdf_file:
-                    await context.bot.send_document(
-                        chat_id=update.effective_chat.id,
-                        document=pdf_file,
-                        filename="דוח_ניתוח_נתונים.pdf",
-                        caption=HEBREW_TEXTS['pdf_ready']
-                    )
-                
-                # ניקוי הקובץ
-                os.remove(pdf_path)
+                await context.bot.send_document(
+                    chat_id=update.effective_chat.id,
+                    document=pdf_bytes,
+                    filename="דוח_ניתוח_נתונים.pdf",
+                    caption=HEBREW_TEXTS['pdf_ready']
+                )
             else:
                 await update.message.reply_text("❌ שגיאה ביצירת הדוח PDF")
         
@@ -510,13 +730,14 @@ class HebrewDataAnalyticsBot:
     async def handle_ask_question_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בבקשת שאלה בשפה טבעית"""
         user_id = update.effective_user.id
+        session = self.sessions.get(user_id)
         
-        if user_id not in self.user_sessions or self.user_sessions[user_id].get('data') is None:
+        if session.get('data_path') is None:
             await update.message.reply_text(HEBREW_TEXTS['no_data'])
             return
         
         # שינוי מצב המשתמש
-        self.user_sessions[user_id]['state'] = 'waiting_for_question'
+        session['state'] = 'waiting_for_question'
         
         await update.message.reply_text(HEBREW_TEXTS['ask_question'])
         await update.message.reply_text(HEBREW_TEXTS['question_examples'])
@@ -524,18 +745,22 @@ class HebrewDataAnalyticsBot:
     async def handle_natural_language_question(self, update: Update, context: ContextTypes.DEFAULT_TYPE, question: str):
         """טיפול בשאלה בשפה טבעית"""
         user_id = update.effective_user.id
+        session = self.sessions.get(user_id)
         
         try:
             # ניתוח השאלה
-            df = self.user_sessions[user_id]['data']
-            analyzer = DataAnalyzer(df)
+            df = await run_blocking(self.sessions.load_data, user_id)
+            analyzer = self._question_analyzer(session, df)
             
-            answer = analyzer.answer_natural_language_question(question)
+            try:
+                answer = await run_blocking(analyzer.answer_natural_language_question, question)
+            finally:
+                analyzer.release()
             
             await update.message.reply_text(f"❓ **שאלה:** {question}\n\n💡 **תשובה:** {answer}")
             
             # החזרה למצב רגיל
-            self.user_sessions[user_id]['state'] = 'main_menu'
+            session['state'] = 'main_menu'
             
             await update.message.reply_text(
                 "יש לך שאלה נוספת?",
@@ -545,85 +770,36 @@ class HebrewDataAnalyticsBot:
         except Exception as e:
             logger.error(f"Error handling question: {e}")
             await update.message.reply_text("❌ שגיאה במענה על השאלה")
-            self.user_sessions[user_id]['state'] = 'main_menu'
+            session['state'] = 'main_menu'
     
+    @per_chat_serialized
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """טיפול בכפתורים inline"""
         query = update.callback_query
         await query.answer()
         
-        user_id = query.from_user.id
-        
-        if query.data.startswith("chart_"):
-            await self.handle_chart_creation(query, query.data.replace("chart_", ""))
-        elif query.data == "back_to_menu":
-            await self.handle_back_to_menu(query)
+        kind, _, arg = query.data.partition('_')
+        handler = self._cb_dispatch.get(kind)
+        if handler is not None:
+            await handler(query, context, arg)
     
-    async def handle_chart_creation(self, query, chart_type: str):
+    async def handle_chart_creation(self, query, context: ContextTypes.DEFAULT_TYPE, chart_type: str):
         """טיפול ביצירת תרשים"""
         user_id = query.from_user.id
+        session = self.sessions.get(user_id)
         
-        if user_id not in self.user_sessions or self.user_sessions[user_id].get('data') is None:
+        if session.get('data_path') is None:
             await query.edit_message_text(HEBREW_TEXTS['no_data'])
             return
         
         await query.edit_message_text("🔄 יוצר תרשים...")
         
         try:
-            df = self.user_sessions[user_id]['data']
-            chart_generator = self.chart_generator
-            
-            chart_file = None
-            
-            if chart_type == 'bar':
-                # בחירת עמודות מתאימות
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                if len(numeric_cols) > 0:
-                    # תרשים עמודות לממוצעים
-                    means = df[numeric_cols].mean().sort_values(ascending=False)
-                    chart_file = chart_generator.create_bar_chart(
-                        pd.DataFrame({'Column': means.index, 'Mean': means.values}),
-                        'Column', 'Mean', "ממוצעים לפי עמודות"
-                    )
-            
-            elif chart_type == 'line':
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                if len(numeric_cols) >= 2:
-                    chart_file = chart_generator.create_line_chart(
-                        df, numeric_cols[0], numeric_cols[1], f"מגמה: {numeric_cols[0]} vs {numeric_cols[1]}"
-                    )
-            
-            elif chart_type == 'pie':
-                # תרשים עוגה לעמודה קטגורית
-                categorical_cols = df.select_dtypes(include=['object']).columns
-                if len(categorical_cols) > 0:
-                    col = categorical_cols[0]
-                    value_counts = df[col].value_counts().head(10)
-                    chart_file = chart_generator.create_pie_chart(
-                        value_counts.reset_index(), 'index', col, f"התפלגות {col}"
-                    )
-            
-            elif chart_type == 'histogram':
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                if len(numeric_cols) > 0:
-                    chart_file = chart_generator.create_histogram(
-                        df, numeric_cols[0], f"היסטוגרמה של {numeric_cols[0]}"
-                    )
-            
-            elif chart_type == 'scatter':
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                if len(numeric_cols) >= 2:
-                    chart_file = chart_generator.create_scatter_plot(
-                        df, numeric_cols[0], numeric_cols[1], 
-                        f"פיזור: {numeric_cols[0]} vs {numeric_cols[1]}"
-                    )
-            
-            elif chart_type == 'box':
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                if len(numeric_cols) > 0:
-                    chart_file = chart_generator.create_box_plot(
-                        df, numeric_cols[0], title=f"תרשים קופסה של {numeric_cols[0]}"
-                    )
+            chart_file = self._get_cached_chart(session, chart_type)
+            if chart_file is None:
+                df = await run_blocking(self.sessions.load_data, user_id)
+                chart_file = await run_blocking(_with_plot_lock, self._build_chart, df, chart_type, session)
+                self._cache_chart(session, chart_type, chart_file)
             
             if chart_file and os.path.exists(chart_file):
                 # שליחת התרשים
@@ -635,9 +811,9 @@ class HebrewDataAnalyticsBot:
                     )
                 
                 # שמירת התרשים בסשן
-                if 'chart_files' not in self.user_sessions[user_id]:
-                    self.user_sessions[user_id]['chart_files'] = []
-                self.user_sessions[user_id]['chart_files'].append(chart_file)
+                chart_files = session.setdefault('chart_files', [])
+                if chart_file not in chart_files:
+                    chart_files.append(chart_file)
                 
                 await query.edit_message_text(HEBREW_TEXTS['chart_sent'])
             else:
@@ -647,9 +823,119 @@ class HebrewDataAnalyticsBot:
             logger.error(f"Error creating chart: {e}")
             await query.edit_message_text("❌ שגיאה ביצירת התרשים")
     
-    async def handle_back_to_menu(self, query):
+    @staticmethod
+    def _chart_cache_key(session: Dict[str, Any], chart_type: str) -> Optional[Tuple]:
+        """מפתח המטמון של תרשים - None אם לנתונים אין טביעת אצבע"""
+        fingerprint = session.get('data_fingerprint')
+        if fingerprint is None:
+            return None
+        return (fingerprint, chart_type, session['numeric_cols'], session['categorical_cols'])
+    
+    def _get_cached_chart(self, session: Dict[str, Any], chart_type: str) -> Optional[str]:
+        """קובץ תרשים מוכן לאותם נתונים ואותו סוג תרשים, אם עדיין קיים"""
+        key = self._chart_cache_key(session, chart_type)
+        chart_file = self._chart_cache.get(key) if key is not None else None
+        if chart_file is None:
+            return None
+        
+        if not os.path.exists(chart_file):
+            del self._chart_cache[key]
+            return None
+        
+        self._chart_cache.move_to_end(key)
+        return chart_file
+    
+    def _cache_chart(self, session: Dict[str, Any], chart_type: str, chart_file: Optional[str]):
+        """שמירת קובץ תרשים חדש במטמון - הישן ביותר נזרק כשהמטמון מלא"""
+        key = self._chart_cache_key(session, chart_type)
+        if key is None or not chart_file:
+            return
+        
+        self._chart_cache[key] = chart_file
+        self._chart_cache.move_to_end(key)
+        while len(self._chart_cache) > CHART_CACHE_SIZE:
+            self._chart_cache.popitem(last=False)
+    
+    @staticmethod
+    def _column_stats(session: Dict[str, Any], df: pd.DataFrame, col: str) -> ColumnStats:
+        """הסטטיסטיקות השמורות של עמודה בסשן, מחוברות לעמודה הנוכחית"""
+        col_stats = session.setdefault('col_stats', {})
+        stats = col_stats.get(col)
+        if stats is None:
+            stats = col_stats[col] = ColumnStats()
+        return stats.bind(df[col])
+    
+    @staticmethod
+    def _question_analyzer(session: Dict[str, Any], df: pd.DataFrame) -> DataAnalyzer:
+        """המנתח השמור של הסשן לשאלות - מיפוי העמודות והאגרגציות נבנים פעם אחת לכל נתונים"""
+        analyzer = session.get('question_analyzer')
+        if analyzer is None:
+            analyzer = session['question_analyzer'] = DataAnalyzer(df)
+        return analyzer.bind(df)
+    
+    def _build_chart(self, df: pd.DataFrame, chart_type: str, session: Dict[str, Any]) -> Optional[str]:
+        """יצירת קובץ התרשים לפי הסוג - פעולה חוסמת, מורצת דרך run_blocking"""
+        chart_generator = self.chart_generator
+        
+        # סוגי העמודות חושבו פעם אחת בטעינת הנתונים
+        numeric_cols = list(session['numeric_cols'])
+        categorical_cols = session['categorical_cols']
+        
+        chart_file = None
+        
+        if chart_type == 'bar':
+            if len(numeric_cols) > 0:
+                # תרשים עמודות לממוצעים - הממוצעים נשמרים בסשן ללחיצות הבאות
+                means = session.get('numeric_means')
+                if means is None:
+                    means = session['numeric_means'] = df[numeric_cols].mean().sort_values(ascending=False)
+                chart_file = chart_generator.create_bar_chart_from_series(means, "ממוצעים לפי עמודות")
+        
+        elif chart_type == 'line':
+            if len(numeric_cols) >= 2:
+                chart_file = chart_generator.create_line_chart(
+                    df, numeric_cols[0], numeric_cols[1], f"מגמה: {numeric_cols[0]} vs {numeric_cols[1]}"
+                )
+        
+        elif chart_type == 'pie':
+            # תרשים עוגה לעמודה קטגורית - ספירת הערכים נשמרת בסשן ללחיצות הבאות
+            if len(categorical_cols) > 0:
+                col = categorical_cols[0]
+                stats = self._column_stats(session, df, col)
+                try:
+                    value_counts = stats.value_counts_top10
+                finally:
+                    stats.release()
+                chart_file = chart_generator.create_pie_chart(
+                    value_counts.to_frame(), col, title=f"התפלגות {col}"
+                )
+        
+        elif chart_type == 'histogram':
+            if len(numeric_cols) > 0:
+                chart_file = chart_generator.create_histogram(
+                    df, numeric_cols[0], f"היסטוגרמה של {numeric_cols[0]}"
+                )
+        
+        elif chart_type == 'scatter':
+            if len(numeric_cols) >= 2:
+                chart_file = chart_generator.create_scatter_plot(
+                    df, numeric_cols[0], numeric_cols[1], 
+                    f"פיזור: {numeric_cols[0]} vs {numeric_cols[1]}"
+                )
+        
+        elif chart_type == 'box':
+            if len(numeric_cols) > 0:
+                chart_file = chart_generator.create_box_plot(
+                    df, numeric_cols[0], title=f"תרשים קופסה של {numeric_cols[0]}"
+                )
+        
+        return chart_file
+    
+    async def handle_back_to_menu(self, query, context: ContextTypes.DEFAULT_TYPE, target: str = 'to_menu'):
         """טיפול בחזרה לתפריט"""
-        await query.edit_message_text(
+        # אי אפשר לצרף מקלדת רגילה לעריכת הודעה - המקלדת נשלחת בהודעה חדשה
+        await query.edit_message_text(HEBREW_TEXTS['main_menu'])
+        await query.message.reply_text(
             HEBREW_TEXTS['main_menu'],
             reply_markup=self.get_main_menu_keyboard()
         )
@@ -657,8 +943,7 @@ class HebrewDataAnalyticsBot:
     def run(self):
         """הפעלת הבוט"""
         logger.info("Starting Hebrew Data Analytics Bot...")
-        self.updater.start_polling()
-        self.updater.idle()
+        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 def main():
     """הפונקציה הראשית"""
@@ -5,11 +5,19 @@ PDF report generation module with full Hebrew RTL support
 PRODUCTION VERSION - NO DEMO DATA
 """
 
+import fpdf
 from fpdf import FPDF
+from fpdf.fonts import TTFFont, SubsetMap
+from fontTools import ttLib
+import copy
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from typing import Dict, List, Any, Optional, Union
 import logging
 import os
+import re
+import tempfile
 from datetime import datetime
 try:
     from zoneinfo import ZoneInfo
@@ -32,15 +40,103 @@ plt.rcParams['font.family'] = ['Noto Sans Hebrew', 'DejaVu Sans', 'Arial Unicode
 
 logger = logging.getLogger(__name__)
 
+# fpdf2 assembles the document in a bytearray and writes it in one go. The legacy PyFPDF
+# package installs under the same "fpdf" name but concatenates str, which is quadratic in report size
+_FPDF_VERSION = getattr(fpdf, '__version__', None) or getattr(fpdf, 'FPDF_VERSION', '0')
+if int(_FPDF_VERSION.split('.')[0]) < 2:
+    logger.warning(f"Legacy fpdf {_FPDF_VERSION} detected - install fpdf2 for faster PDF output")
+
+# Number of shaped RTL strings kept in memory - section titles and labels repeat across a report
+RTL_CACHE_SIZE = 4096
+
+# Arabic letters and presentation forms - only these need arabic_reshaper, Hebrew letters never join
+_ARABIC_CHARS = re.compile('[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# Parsed TTF fonts by (file, style) - metrics are read once per process and copied into each report
+_FONT_PROTOTYPES: Dict[tuple, TTFFont] = {}
+
+# Charts are embedded as JPEG, resampled to the box they occupy on the page
+CHART_EMBED_DPI = 150
+CHART_JPEG_QUALITY = 80
+CHART_HEIGHT_MM = 100
+
+# Threads decoding and re-encoding chart images at once - PIL releases the GIL while it works
+CHART_PREP_WORKERS = 8
+
+
+@functools.lru_cache(maxsize=RTL_CACHE_SIZE)
+def _shape_rtl(text: str) -> str:
+    """עיצוב טקסט עברי לתצוגה מימין לשמאל - התוצאה נשמרת לכל מחרוזת"""
+    if any('\u0590' <= char <= '\u05FF' for char in text):
+        # Apply the bidirectional algorithm, joining Arabic letters first if there are any
+        if _ARABIC_CHARS.search(text):
+            text = arabic_reshaper.reshape(text)
+        return get_display(text)
+    return text
+
+
+def prepare_chart_image(chart_file_path: str, width_mm: float, height_mm: float) -> io.BytesIO:
+    """פענוח תרשים PNG פעם אחת והמרתו ל-JPEG בגודל שבו הוא מוצג בדף"""
+    size = (round(width_mm / 25.4 * CHART_EMBED_DPI), round(height_mm / 25.4 * CHART_EMBED_DPI))
+    
+    with Image.open(chart_file_path) as img:
+        img = img.convert('RGBA')
+        # Flatten transparency onto white - JPEG has no alpha channel
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+    
+    buffer = io.BytesIO()
+    background.resize(size, Image.Resampling.BILINEAR).save(buffer, format='JPEG', quality=CHART_JPEG_QUALITY)
+    buffer.seek(0)
+    return buffer
+
+
+def _add_cached_font(pdf: FPDF, family: str, style: str, font_path: str):
+    """הוספת גופן TTF למסמך - המדדים (רוחב תווים, מפת גליפים) נקראים מהקובץ פעם אחת בכל תהליך
+
+    כל מסמך מקבל עותק משלו עם קובץ גופן פתוח מחדש ומפת subset ריקה,
+    כי fpdf חותך את הגופן במקום בזמן השמירה
+    """
+    fontkey = f"{family.lower()}{style}"
+    prototype = _FONT_PROTOTYPES.get((font_path, style))
+    if prototype is None:
+        prototype = _FONT_PROTOTYPES[(font_path, style)] = TTFFont(pdf, font_path, fontkey, style)
+    
+    font = copy.copy(prototype)
+    font.i = len(pdf.fonts) + 1
+    font.fontkey = fontkey
+    font.hbfont = None
+    font.missing_glyphs = []
+    # Lazy open only reads the table directory - the expensive metrics come from the prototype
+    font.ttfont = ttLib.TTFont(font_path, recalcTimestamp=False, fontNumber=0, lazy=True)
+    
+    # Same reserved characters as fpdf's own add_font
+    reserved = "\x00 \r\n"
+    if pdf.str_alias_nb_pages:
+        reserved += "0123456789" + pdf.str_alias_nb_pages
+    font.subset = SubsetMap(font, [ord(char) for char in reserved])
+    
+    pdf.fonts[fontkey] = font
+
+
+def init_pdf_worker():
+    """אתחול תהליך נפרד ליצירת דוחות - matplotlib ללא ממשק גרפי"""
+    plt.switch_backend('Agg')
+
+
 class HebrewPDFReport:
     def __init__(self):
         self.pdf = FPDF()
-        self.setup_hebrew_support()
         self.current_y = 0
         self.page_width = 210
         self.page_height = 297
         self.margin = 20
         self.rtl_support = True
+        self.setup_hebrew_support()
+        # Per-character widths by (font family, style, size) - filled lazily while wrapping
+        self._char_widths: Dict[tuple, Dict[str, float]] = {}
+        # Measured strings by (font family, style, size, text) - titles and labels repeat across pages
+        self._text_widths: Dict[tuple, float] = {}
     
     def _fix_hebrew_text(self, text: str) -> str:
         """תיקון טקסט עברי לתצוגה נכונה מימין לשמאל"""
@@ -48,14 +144,12 @@ class HebrewPDFReport:
             if not text:
                 return ""
             
+            # ASCII text has no RTL characters - returned as is, without touching the cache
+            if text.isascii():
+                return text
+            
             # Handle mixed Hebrew-English text
-            if any('\u0590' <= char <= '\u05FF' for char in text):
-                # Reshape Arabic/Hebrew characters
-                reshaped_text = arabic_reshaper.reshape(text)
-                # Apply bidirectional algorithm
-                bidi_text = get_display(reshaped_text)
-                return bidi_text
-            return text
+            return _shape_rtl(text)
         except Exception as e:
             logger.warning(f"Error fixing Hebrew text: {e}")
             return text
@@ -112,11 +206,8 @@ class HebrewPDFReport:
             
             # Add fonts to PDF
             if regular_font:
-                self.pdf.add_font('Hebrew', '', regular_font, uni=True)
-                if bold_font:
-                    self.pdf.add_font('Hebrew', 'B', bold_font, uni=True)
-                else:
-                    self.pdf.add_font('Hebrew', 'B', regular_font, uni=True)
+                _add_cached_font(self.pdf, 'Hebrew', '', regular_font)
+                _add_cached_font(self.pdf, 'Hebrew', 'B', bold_font or regular_font)
                 
                 self.pdf.set_font('Hebrew', '', 12)
                 logger.info("Hebrew fonts loaded successfully")
@@ -133,11 +224,16 @@ class HebrewPDFReport:
             self.pdf.set_font('Arial', '', 12)
     
     def _get_text_width(self, text: str) -> float:
-        """חישוב רוחב טקסט"""
-        try:
-            return self.pdf.get_string_width(text)
-        except:
-            return len(text) * 2  # Rough estimation
+        """חישוב רוחב טקסט - כל מחרוזת נמדדת פעם אחת לכל גופן וגודל"""
+        key = (self.pdf.font_family, self.pdf.font_style, self.pdf.font_size_pt, text)
+        width = self._text_widths.get(key)
+        if width is None:
+            try:
+                width = self.pdf.get_string_width(text)
+            except:
+                return len(text) * 2  # Rough estimation
+            self._text_widths[key] = width
+        return width
     
     def _add_rtl_text(self, x: float, y: float, text: str, align: str = 'R'):
         """הוספת טקסט מימין לשמאל"""
@@ -251,12 +347,13 @@ class HebrewPDFReport:
     def add_text(self, text: str, font_size: int = 12, bold: bool = False, 
                  indent: int = 0):
         """הוספת טקסט עם תמיכה מלאה ב-RTL"""
+        self.add_text_lines([text], font_size, bold, indent)
+    
+    def add_text_lines(self, texts: List[str], font_size: int = 12, bold: bool = False,
+                       indent: int = 0):
+        """הוספת כמה פסקאות באותו עיצוב - הגופן והרוחב נקבעים פעם אחת לכל הקבוצה"""
         try:
             # Normalize inputs to avoid NoneType issues
-            if text is None:
-                text = ""
-            if not isinstance(text, str):
-                text = str(text)
             try:
                 font_size = float(font_size) if font_size is not None else 12.0
             except Exception:
@@ -272,25 +369,51 @@ class HebrewPDFReport:
             else:
                 self.pdf.set_font('Hebrew', '', font_size)
             
-            # Check if new page needed
-            if self.current_y > self.page_height - 30:
-                self.pdf.add_page()
-                self.current_y = self.margin + 10
-            
-            # Handle long text - wrap lines
             max_width = self.page_width - 2 * self.margin - indent
-            lines = self._wrap_text_rtl(text, max_width)
-            
-            for line in lines:
-                if line.strip():  # Skip empty lines
-                    self._add_rtl_text(indent, self.current_y, line.strip(), 'R')
-                self.current_y += font_size * 0.4 + 2
+            line_height = font_size * 0.4 + 2
             
-            self.current_y += 3
+            for text in texts:
+                if text is None:
+                    text = ""
+                if not isinstance(text, str):
+                    text = str(text)
+                
+                # Check if new page needed
+                if self.current_y > self.page_height - 30:
+                    self.pdf.add_page()
+                    self.current_y = self.margin + 10
+                
+                # Handle long text - wrap lines
+                lines = self._wrap_text_rtl(text, max_width)
+                
+                for line in lines:
+                    if line.strip():  # Skip empty lines
+                        self._add_rtl_text(indent, self.current_y, line.strip(), 'R')
+                    self.current_y += line_height
+                
+                self.current_y += 3
             
         except Exception as e:
             logger.error(f"Error adding text: {e}")
     
+    def _char_width_table(self) -> Dict[str, float]:
+        """טבלת רוחב התווים של הגופן הנוכחי"""
+        key = (self.pdf.font_family, self.pdf.font_style, self.pdf.font_size_pt)
+        table = self._char_widths.get(key)
+        if table is None:
+            table = self._char_widths[key] = {}
+        return table
+    
+    def _measure(self, text: str, table: Dict[str, float]) -> float:
+        """רוחב טקסט כסכום רוחב התווים - כל תו נמדד פעם אחת בלבד"""
+        width = 0.0
+        for char in text:
+            char_width = table.get(char)
+            if char_width is None:
+                char_width = table[char] = self._get_text_width(char)
+            width += char_width
+        return width
+    
     def _wrap_text_rtl(self, text: str, max_width: float) -> List[str]:
         """חלוקת טקסט ארוך לשורות עם תמיכה ב-RTL"""
         try:
@@ -300,19 +423,27 @@ class HebrewPDFReport:
                 text = str(text)
             words = text.split()
             lines = []
-            current_line = ""
+            current_words = []
+            current_width = 0.0
+            
+            # Running line width - each word is measured once, the line is never re-measured
+            table = self._char_width_table()
+            space_width = self._measure(" ", table)
             
             for word in words:
-                test_line = f"{current_line} {word}" if current_line else word
-                if self._get_text_width(test_line) <= max_width:
-                    current_line = test_line
+                word_width = self._measure(word, table)
+                test_width = current_width + space_width + word_width if current_words else word_width
+                if test_width <= max_width:
+                    current_words.append(word)
+                    current_width = test_width
                 else:
-                    if current_line:
-                        lines.append(current_line)
-                    current_line = word
+                    if current_words:
+                        lines.append(" ".join(current_words))
+                    current_words = [word]
+                    current_width = word_width
             
-            if current_line:
-                lines.append(current_line)
+            if current_words:
+                lines.append(" ".join(current_words))
             
             return lines
             
@@ -374,17 +505,21 @@ class HebrewPDFReport:
                 corr_matrix = df[numeric_cols].corr()
                 analysis_results['correlation_matrix'] = corr_matrix
                 
-                # Find strong correlations
-                strong_correlations = []
-                for i in range(len(corr_matrix.columns)):
-                    for j in range(i+1, len(corr_matrix.columns)):
-                        corr_val = corr_matrix.iloc[i, j]
-                        if abs(corr_val) > 0.5:  # Strong correlation threshold
-                            strong_correlations.append({
-                                'column1': corr_matrix.columns[i],
-                                'column2': corr_matrix.columns[j],
-                                'correlation': round(corr_val, 3)
-                            })
+                # Find strong correlations - one vectorized pass over the upper triangle
+                corr_values = corr_matrix.to_numpy()
+                rows, cols = np.triu_indices(len(corr_matrix.columns), k=1)
+                pair_values = corr_values[rows, cols]
+                strong = np.abs(pair_values) > 0.5  # Strong correlation threshold
+                
+                columns = corr_matrix.columns
+                strong_correlations = [
+                    {
+                        'column1': columns[i],
+                        'column2': columns[j],
+                        'correlation': round(float(corr_val), 3)
+                    }
+                    for i, j, corr_val in zip(rows[strong], cols[strong], pair_values[strong])
+                ]
                 
                 analysis_results['strong_correlations'] = strong_correlations
             
@@ -535,30 +670,37 @@ class HebrewPDFReport:
                 self.add_section_header(f"עמודה: {col_name}", 2)
                 
                 # Basic info
-                self.add_text(f"סוג נתונים: {col_info['type']}", 11, indent=5)
-                self.add_text(f"ערכים ייחודיים: {col_info['unique_values']:,}", 11, indent=5)
+                basic_lines = [
+                    f"סוג נתונים: {col_info['type']}",
+                    f"ערכים ייחודיים: {col_info['unique_values']:,}",
+                ]
                 
                 # Null values
                 if col_info['null_count'] > 0:
-                    self.add_text(f"ערכים חסרים: {col_info['null_count']:,} ({col_info['null_percentage']}%)", 
-                                11, indent=5)
+                    basic_lines.append(f"ערכים חסרים: {col_info['null_count']:,} ({col_info['null_percentage']}%)")
+                
+                self.add_text_lines(basic_lines, 11, indent=5)
                 
                 # Numeric column statistics
                 if 'mean' in col_info:
                     self.add_text("סטטיסטיקות:", 11, bold=True, indent=5)
-                    self.add_text(f"ממוצע: {col_info['mean']}", 10, indent=15)
-                    self.add_text(f"חציון: {col_info['median']}", 10, indent=15)
-                    self.add_text(f"סטיית תקן: {col_info['std']}", 10, indent=15)
-                    self.add_text(f"מינימום: {col_info['min']}", 10, indent=15)
-                    self.add_text(f"מקסימום: {col_info['max']}", 10, indent=15)
-                    self.add_text(f"רבעון ראשון: {col_info['q25']}", 10, indent=15)
-                    self.add_text(f"רבעון שלישי: {col_info['q75']}", 10, indent=15)
+                    self.add_text_lines([
+                        f"ממוצע: {col_info['mean']}",
+                        f"חציון: {col_info['median']}",
+                        f"סטיית תקן: {col_info['std']}",
+                        f"מינימום: {col_info['min']}",
+                        f"מקסימום: {col_info['max']}",
+                        f"רבעון ראשון: {col_info['q25']}",
+                        f"רבעון שלישי: {col_info['q75']}",
+                    ], 10, indent=15)
                 
                 # Categorical column analysis
                 elif 'top_values' in col_info:
                     self.add_text("ערכים נפוצים:", 11, bold=True, indent=5)
-                    for value, count in col_info['top_values'].items():
-                        self.add_text(f"{value}: {count}", 10, indent=15)
+                    self.add_text_lines(
+                        [f"{value}: {count}" for value, count in col_info['top_values'].items()],
+                        10, indent=15
+                    )
                     
                     if col_info['unique_ratio'] < 0.05:
                         self.add_text("עמודה קטגורית עם ערכים מעטים", 10, indent=5)
@@ -702,16 +844,13 @@ class HebrewPDFReport:
                 "השתמש בויזואליזציות להבנה טובה יותר של הנתונים"
             ]
             
-            recommendations.extend(general_recommendations)
+            # Add recommendations to report - one block per style
+            # Specific recommendations (no emoji to ensure glyph availability)
+            if recommendations:
+                self.add_text_lines([f"• {rec}" for rec in recommendations], 11, bold=True, indent=5)
             
-            # Add recommendations to report
-            for i, rec in enumerate(recommendations, 1):
-                if i <= len(recommendations) - len(general_recommendations):
-                    # Specific recommendations (no emoji to ensure glyph availability)
-                    self.add_text(f"• {rec}", 11, bold=True, indent=5)
-                else:
-                    # General recommendations
-                    self.add_text(f"• {rec}", 11, indent=5)
+            # General recommendations
+            self.add_text_lines([f"• {rec}" for rec in general_recommendations], 11, indent=5)
             
         except Exception as e:
             logger.error(f"Error adding recommendations: {e}")
@@ -929,8 +1068,15 @@ class HebrewPDFReport:
                 'area_timeseries.png': 'תרשים שטח - סדרת זמן יומית'
             }
             
+            # Decode and resize all charts in parallel, then embed them in order - fpdf itself is not thread-safe
+            existing = [chart_file for chart_file in chart_files if os.path.exists(chart_file)]
+            chart_width = self.page_width - 2 * self.margin
+            with ThreadPoolExecutor(max_workers=max(1, min(CHART_PREP_WORKERS, len(existing)))) as executor:
+                prepared = {chart_file: executor.submit(prepare_chart_image, chart_file, chart_width, CHART_HEIGHT_MM)
+                            for chart_file in existing}
+            
             for i, chart_file in enumerate(chart_files):
-                if os.path.exists(chart_file):
+                if chart_file in prepared:
                     # Add chart description
                     filename = os.path.basename(chart_file)
                     description = "תרשים נתונים"
@@ -943,13 +1089,18 @@ class HebrewPDFReport:
                     self.add_text(f"תרשים {i+1}: {description}", 12, bold=True)
                     
                     # Add the chart
-                    self.add_chart(chart_file)
+                    try:
+                        chart_image = prepared[chart_file].result()
+                    except Exception as e:
+                        logger.error(f"Error preparing chart {chart_file}: {e}")
+                        continue
+                    self.add_chart(chart_file, chart_image)
                     
         except Exception as e:
             logger.error(f"Error adding charts section: {e}")
     
-    def add_chart(self, chart_file_path: str):
-        """הוספת תרשים בודד לדוח"""
+    def add_chart(self, chart_file_path: str, chart_image: Optional[io.BytesIO] = None):
+        """הוספת תרשים בודד לדוח - chart_image הוא תרשים שכבר הוכן עם prepare_chart_image"""
         try:
             if not os.path.exists(chart_file_path):
                 logger.warning(f"Chart file not found: {chart_file_path}")
@@ -962,9 +1113,12 @@ class HebrewPDFReport:
             
             # Add the chart
             chart_width = self.page_width - 2 * self.margin
-            chart_height = 100
+            chart_height = CHART_HEIGHT_MM
             
-            self.pdf.image(chart_file_path, x=self.margin, y=self.current_y, 
+            # Pre-decoded JPEG - fpdf embeds it as is, without parsing the PNG and its alpha channel
+            if chart_image is None:
+                chart_image = prepare_chart_image(chart_file_path, chart_width, chart_height)
+            self.pdf.image(chart_image, x=self.margin, y=self.current_y, 
                           w=chart_width, h=chart_height)
             
             self.current_y += chart_height + 10
@@ -973,8 +1127,9 @@ class HebrewPDFReport:
             logger.error(f"Error adding chart: {e}")
     
     def generate_comprehensive_report(self, df: pd.DataFrame, 
-                                    output_path: str = "data_analysis_report.pdf") -> str:
-        """יצירת דוח מקיף מנתונים אמיתיים"""
+                                    output_path: str = "data_analysis_report.pdf",
+                                    return_bytes: bool = False) -> Union[str, bytes, None]:
+        """יצירת דוח מקיף מנתונים אמיתיים - עם return_bytes מוחזר תוכן ה-PDF ולא נכתב קובץ"""
         try:
             # Analyze the data
             analysis_results = self.analyze_real_data(df)
@@ -1023,13 +1178,21 @@ class HebrewPDFReport:
             # Add recommendations
             self.add_recommendations_section(analysis_results, df)
             
-            # Create and add charts
-            chart_files = self.create_visualizations(df)
-            if chart_files:
-                self.add_charts_section(chart_files)
+            # Create and add charts - in a private directory, so concurrent reports never overwrite each other
+            with tempfile.TemporaryDirectory(prefix='report_charts_') as charts_dir:
+                chart_files = self.create_visualizations(df, output_dir=charts_dir)
+                if chart_files:
+                    self.add_charts_section(chart_files)
+                
+                # Render the whole document in memory, then write it with a single call
+                pdf_bytes = bytes(self.pdf.output())
+            
+            if return_bytes:
+                logger.info(f"Comprehensive PDF report generated in memory ({len(pdf_bytes)} bytes)")
+                return pdf_bytes
             
-            # Save the report
-            self.pdf.output(output_path)
+            with open(output_path, 'wb') as f:
+                f.write(pdf_bytes)
             logger.info(f"Comprehensive PDF report generated: {output_path}")
             
             return output_path
@@ -1041,7 +1204,8 @@ class HebrewPDFReport:
 
 def generate_complete_data_report(df: pd.DataFrame, 
                                 output_path: str = "complete_data_report.pdf",
-                                include_charts: bool = True) -> str:
+                                include_charts: bool = True,
+                                return_bytes: bool = False) -> Union[str, bytes, None]:
     """
     פונקציה ראשית ליצירת דוח מקיף מנתונים
     Main function to generate comprehensive report from real data
@@ -1050,9 +1214,10 @@ def generate_complete_data_report(df: pd.DataFrame,
         df: DataFrame with your data
         output_path: Path for the output PDF file
         include_charts: Whether to include charts and visualizations
+        return_bytes: Return the PDF content instead of writing output_path
     
     Returns:
-        str: Path to the generated PDF file, or None if failed
+        str: Path to the generated PDF file (bytes with return_bytes), or None if failed
     """
     try:
         # Validate input
@@ -1064,7 +1229,7 @@ def generate_complete_data_report(df: pd.DataFrame,
         report = HebrewPDFReport()
         
         # Generate comprehensive report
-        result_path = report.generate_comprehensive_report(df, output_path)
+        result_path = report.generate_comprehensive_report(df, output_path, return_bytes=return_bytes)
         
         return result_path
         
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+מאגר סשנים - In-process user session store with idle expiry
+"""
+
+import os
+import time
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# זמן (בשניות) שאחריו סשן ללא פעילות נמחק
+SESSION_TTL = 3600.0
+
+# כל כמה שניות נסרקים הסשנים שפג תוקפם
+SESSION_SWEEP_INTERVAL = 300.0
+
+# מספר הסשנים המרבי בזיכרון - מעבר לכך נמחק הסשן שלא היה פעיל הכי הרבה זמן
+SESSION_MAX_COUNT = 10000
+
+# תיקיית הנתונים של הסשנים - טבלה אחת בקובץ pickle לכל משתמש
+SESSION_DATA_DIR = os.path.join(tempfile.gettempdir(), 'hebrew_bot_sessions')
+
+
+def new_session() -> Dict[str, Any]:
+    """סשן ריק במצב התפריט הראשי"""
+    return {
+        'state': 'main_menu',
+        'data_path': None,
+        'analysis_results': None,
+        'chart_files': []
+    }
+
+
+class SessionStore:
+    """סשנים של משתמשים לפי user_id - סשן שלא נגעו בו במשך ttl שניות נמחק
+
+    טבלאות הנתונים לא נשמרות בזיכרון אלא בקובץ בתיקיית data_dir,
+    והסשן מחזיק רק את הנתיב (data_path). מספר הסשנים מוגבל ל-max_sessions,
+    והסשנים שמורים לפי סדר הפעילות האחרונה (הישן ביותר ראשון).
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, sweep_interval: float = SESSION_SWEEP_INTERVAL,
+                 data_dir: str = SESSION_DATA_DIR, max_sessions: int = SESSION_MAX_COUNT):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.data_dir = data_dir
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._last_seen: Dict[int, float] = {}
+        self._last_sweep = time.monotonic()
+        # store_data נקרא גם מתהליכונים ברקע - שינויים בסדר הסשנים מוגנים בנעילה
+        self._lock = threading.RLock()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, user_id: int) -> Dict[str, Any]:
+        """קבלת הסשן של המשתמש - סשן חדש נוצר אם אין או שפג תוקפו"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self.evict_expired(now)
+
+            session = self._sessions.get(user_id)
+            if session is None or now - self._last_seen[user_id] > self.ttl:
+                if session is not None:
+                    self._remove_data(session)
+                session = self._sessions[user_id] = new_session()
+
+            self._touch(user_id, now)
+            return session
+
+    def update(self, user_id: int, values: Dict[str, Any]) -> Dict[str, Any]:
+        """עדכון שדות בסשן של המשתמש"""
+        session = self.get(user_id)
+        session.update(values)
+        return session
+
+    def reset(self, user_id: int) -> Dict[str, Any]:
+        """התחלת סשן חדש למשתמש"""
+        with self._lock:
+            old_session = self._sessions.get(user_id)
+            if old_session is not None:
+                self._remove_data(old_session)
+            self._sessions[user_id] = session = new_session()
+            self._touch(user_id, time.monotonic())
+            return session
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """מחיקת סשנים שלא היו פעילים יותר מ-ttl שניות"""
+        if now is None:
+            now = time.monotonic()
+
+        # הסשנים ממוינים לפי פעילות אחרונה - הסריקה נעצרת בסשן הפעיל הראשון
+        expired = 0
+        with self._lock:
+            self._last_sweep = now
+            for user_id in list(self._sessions):
+                if now - self._last_seen[user_id] <= self.ttl:
+                    break
+                self._evict(user_id)
+                expired += 1
+
+        if expired:
+            logger.info(f"Evicted {expired} idle sessions")
+        return expired
+
+    def _touch(self, user_id: int, now: float):
+        """סימון פעילות - הסשן עובר לסוף הסדר, והישן ביותר נמחק אם עברנו את המגבלה"""
+        self._last_seen[user_id] = now
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.max_sessions:
+            self._evict(next(iter(self._sessions)))
+
+    def _evict(self, user_id: int):
+        """מחיקת סשן והקבצים שלו"""
+        self._remove_data(self._sessions.pop(user_id))
+        del self._last_seen[user_id]
+
+    def store_data(self, user_id: int, df: pd.DataFrame) -> str:
+        """שמירת טבלת הנתונים של המשתמש בקובץ ועדכון data_path בסשן"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = os.path.join(self.data_dir, f"{user_id}.pkl")
+
+        # כתיבה לקובץ זמני והחלפה - קורא במקביל לא יראה קובץ חלקי
+        tmp_path = f"{path}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+        self.get(user_id)['data_path'] = path
+        return path
+
+    def load_data(self, user_id: int) -> Optional[pd.DataFrame]:
+        """טעינת טבלת הנתונים של המשתמש מהקובץ - None אם אין נתונים"""
+        path = self.get(user_id).get('data_path')
+        if not path:
+            return None
+
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.error(f"Error loading session data {path}: {e}")
+            return None
+
+    @staticmethod
+    def _remove_data(session: Dict[str, Any]):
+        """מחיקת קובץ הנתונים והתרשימים של סשן שהסתיים"""
+        paths = [session.get('data_path'), *session.get('chart_files', ())]
+        for path in paths:
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
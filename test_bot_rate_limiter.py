@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בדיקות למגביל הקצב - Tests for the outgoing request rate limiter
+"""
+
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from bot_rate_limiter import BotRateLimiter
+
+
+def test_rate_limiter_paces_requests():
+    """בקשות מעבר לקיבולת הדלי ממתינות לאסימון"""
+    print("🔍 Testing BotRateLimiter pacing...")
+
+    limiter = BotRateLimiter(overall_max_rate=5, overall_time_period=0.1)
+
+    async def send(i):
+        return i
+
+    async def scenario():
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            limiter.process_request(send, (i,), {}, 'sendMessage', {'chat_id': 1}, None)
+            for i in range(10)
+        ))
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(scenario())
+
+    assert results == list(range(10))
+    assert elapsed >= 0.08
+
+    print("✅ pacing OK")
+
+
+def test_rate_limiter_retries_after_429():
+    """שגיאת RetryAfter גורמת לשליחה חוזרת עד max_retries"""
+    print("🔍 Testing BotRateLimiter retries...")
+
+    limiter = BotRateLimiter(max_retries=2)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RetryAfter(0)
+        return 'ok'
+
+    async def always_limited():
+        raise RetryAfter(0)
+
+    async def scenario():
+        result = await limiter.process_request(flaky, (), {}, 'sendPhoto', {'chat_id': 1}, None)
+        try:
+            await limiter.process_request(always_limited, (), {}, 'sendPhoto', {'chat_id': 1}, 0)
+        except RetryAfter:
+            return result, True
+        return result, False
+
+    result, raised = asyncio.run(scenario())
+
+    assert result == 'ok'
+    assert len(calls) == 3
+    assert raised
+
+    print("✅ retries OK")
+
+
+if __name__ == "__main__":
+    test_rate_limiter_paces_requests()
+    test_rate_limiter_retries_after_429()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בדיקות למודול ניתוח הנתונים - Tests for the DataAnalyzer module
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_analysis import DataAnalyzer, ColumnStats
+
+
+def _sample_df() -> pd.DataFrame:
+    """נתוני דוגמה עם ערכים חסרים"""
+    return pd.DataFrame({
+        'גיל': [25, np.nan, 31, 28, 42, 35],
+        'משכורת': [8000.0, 12000.0, np.nan, 9500.0, 18000.0, 15000.0],
+        'עיר': [None, 'חיפה', 'תל אביב', 'חיפה', 'נתניה', 'ירושלים'],
+        'ריק': [np.nan] * 6,
+    })
+
+
+def test_clean_data_fills_missing_values():
+    """ניקוי הנתונים ממלא חציון במספרים וערך נפוץ בטקסט"""
+    print("🔍 Testing DataAnalyzer.clean_data...")
+
+    analyzer = DataAnalyzer(_sample_df())
+    clean_df = analyzer.clean_data()
+
+    assert 'ריק' not in clean_df.columns
+    assert clean_df.isna().sum().sum() == 0
+    assert clean_df['גיל'].iloc[1] == 31.0
+    assert clean_df['משכורת'].iloc[2] == 12000.0
+    assert clean_df['עיר'].iloc[0] == 'חיפה'
+
+    print("✅ clean_data OK")
+
+
+def test_clean_data_keeps_rows_differing_only_in_type():
+    """שורות שנראות זהות כטקסט אך שונות בסוג לא נמחקות ככפולות"""
+    print("🔍 Testing DataAnalyzer.clean_data duplicates...")
+
+    df = pd.DataFrame({'v': [1, '1', 1], 'w': ['a', 'a', 'a']})
+    clean_df = DataAnalyzer(df).clean_data()
+
+    assert len(clean_df) == len(df.drop_duplicates()) == 2
+
+    print("✅ clean_data duplicates OK")
+
+
+def test_clean_data_mixed_type_column_names():
+    """שמות עמודות שאינם טקסט לא מפילים את הניקוי"""
+    print("🔍 Testing DataAnalyzer.clean_data column names...")
+
+    df = pd.DataFrame({'a b': [1.0, np.nan, 3.0], 'x': ['p', 'q', 'q'], 5: [1, 2, 3], 7: [4, 5, 6]})
+    clean_df = DataAnalyzer(df).clean_data()
+
+    assert list(clean_df.columns) == ['a_b', 'x', '5', '7']
+    assert clean_df['a_b'].iloc[1] == 2.0
+
+    print("✅ clean_data column names OK")
+
+
+def test_detect_outliers_returns_index_labels():
+    """זיהוי ערכים חריגים לפי IQR מחזיר את תוויות האינדקס"""
+    print("🔍 Testing DataAnalyzer.detect_outliers...")
+
+    df = pd.DataFrame({
+        'a': [1, 2, 3, 4, 100, np.nan],
+        'b': [1.0, 1.0, 1.0, 1.0, 1.0, -50.0],
+    }, index=list('uvwxyz'))
+    outliers = DataAnalyzer(df).detect_outliers()
+
+    assert outliers == {'a': ['y'], 'b': ['z']}
+
+    print("✅ detect_outliers OK")
+
+
+def test_analyzer_does_not_mutate_input():
+    """הניתוח לא משנה את ה-DataFrame המקורי של הקורא"""
+    print("🔍 Testing DataAnalyzer input isolation...")
+
+    df = pd.DataFrame({
+        'תאריך': ['2024-01-03', '2024-01-01', 'לא תאריך', '2024-01-02'],
+        'מכירות': [3.0, 1.0, 5.0, 2.0],
+        'עמודה עם רווח': ['a', None, 'b', 'a'],
+    })
+    snapshot = df.copy()
+
+    analyzer = DataAnalyzer(df)
+    analyzer.clean_data()
+    trends = analyzer.trend_analysis('תאריך', 'מכירות')
+    DataAnalyzer(df).trend_analysis('תאריך', 'מכירות')
+
+    pd.testing.assert_frame_equal(df, snapshot)
+    assert trends['trend_direction'] == 'עולה'
+
+    print("✅ input isolation OK")
+
+
+def test_answer_natural_language_question():
+    """מענה על שאלות נפוצות בעברית"""
+    print("🔍 Testing DataAnalyzer.answer_natural_language_question...")
+
+    df = pd.DataFrame({'גיל': [20, 30, 40], 'משכורת': [1000.0, 3000.0, 2000.0]})
+    analyzer = DataAnalyzer(df)
+
+    assert analyzer.answer_natural_language_question("מה הממוצע של גיל?") == "הממוצע של גיל הוא 30.00"
+    assert analyzer.answer_natural_language_question("מי הכי גבוה במשכורת") == "הערך הגבוה ביותר ב-משכורת הוא 3000.00"
+    assert analyzer.answer_natural_language_question("מינימום גיל") == "הערך הנמוך ביותר ב-גיל הוא 20.00"
+    assert analyzer.answer_natural_language_question("כמה שורות יש?") == "יש 3 שורות בנתונים"
+
+    print("✅ natural language answers OK")
+
+
+def test_analyzer_rebind_keeps_aggregates():
+    """מנתח ששוחרר וחובר מחדש לאותם נתונים לא מחשב שוב את האגרגציות"""
+    print("🔍 Testing DataAnalyzer bind/release...")
+
+    df = pd.DataFrame({'גיל': [20, 30, 40], 'משכורת': [1000.0, 3000.0, 2000.0]})
+    analyzer = DataAnalyzer(df)
+
+    assert analyzer.answer_natural_language_question("מה הממוצע של גיל?") == "הממוצע של גיל הוא 30.00"
+    aggregates = analyzer._numeric_aggregates()
+    analyzer.release()
+
+    analyzer.bind(df.copy())
+    assert analyzer.answer_natural_language_question("מקסימום משכורת") == "הערך הגבוה ביותר ב-משכורת הוא 3000.00"
+    assert analyzer._numeric_aggregates() is aggregates
+
+    print("✅ bind/release OK")
+
+
+def test_question_column_map_survives_rebind():
+    """מיפוי שמות העמודות לשאלות נבנה פעם אחת ונשמר גם אחרי חיבור מחדש"""
+    print("🔍 Testing DataAnalyzer question column map...")
+
+    df = pd.DataFrame({'Age': [20, 30, 40], 'עיר': ['a', 'b', 'c']})
+    analyzer = DataAnalyzer(df)
+
+    column_map = analyzer._numeric_cols_by_lower()
+    analyzer.release()
+    analyzer.bind(df.copy())
+
+    assert analyzer._numeric_cols_by_lower() is column_map
+    assert analyzer.answer_natural_language_question("מה הממוצע של age") == "הממוצע של Age הוא 30.00"
+
+    print("✅ question column map OK")
+
+
+def test_column_stats_are_cached():
+    """הסטטיסטיקות מחושבות פעם אחת ונשארות זמינות גם אחרי שחרור העמודה"""
+    print("🔍 Testing ColumnStats caching...")
+
+    df = _sample_df()
+    stats = ColumnStats().bind(df['עיר'])
+    assert stats.value_counts_top10.to_dict() == {'חיפה': 2, 'תל אביב': 1, 'נתניה': 1, 'ירושלים': 1}
+    assert stats.nunique == 4
+    assert stats.mean is None
+    stats.release()
+
+    assert stats.value_counts_top10.iloc[0] == 2
+    assert ColumnStats(df['גיל']).mean == 32.2
+
+    print("✅ column stats OK")
+
+
+if __name__ == "__main__":
+    test_clean_data_fills_missing_values()
+    test_clean_data_keeps_rows_differing_only_in_type()
+    test_clean_data_mixed_type_column_names()
+    test_detect_outliers_returns_index_labels()
+    test_analyzer_does_not_mutate_input()
+    test_answer_natural_language_question()
+    test_analyzer_rebind_keeps_aggregates()
+    test_question_column_map_survives_rebind()
+    test_column_stats_are_cached()
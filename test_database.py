@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בדיקות למודול מסד הנתונים - Tests for the DatabaseManager module
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+
+from database import DatabaseManager
+
+
+def test_database_uses_wal_journal():
+    """מסד נתונים בקובץ עובר למצב WAL באתחול"""
+    print("🔍 Testing DatabaseManager journal mode...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bot.db')
+        DatabaseManager(db_path).close()
+
+        conn = sqlite3.connect(db_path)
+        try:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            conn.close()
+
+    assert mode == 'wal'
+
+    print("✅ WAL journal OK")
+
+
+def test_session_round_trip():
+    """יצירת משתמש, סשן וניתוח ושליפת הסטטיסטיקות"""
+    print("🔍 Testing DatabaseManager session round trip...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, 'bot.db'))
+        db.add_user(1, 'user', 'First', 'Last')
+        db.add_user(1, 'renamed', 'First', 'Last')
+        session_id = db.create_session(1, 'data.csv', 'csv', 1024)
+        db.update_session_analysis(session_id, 'comprehensive_analysis', {'rows': 10})
+        db.update_session_analyses(session_id, [('outliers', {}), ('trends', {'slope': 1.5})])
+
+        session = db.get_active_session(1)
+        stats = db.get_user_stats(1)
+        db.close()
+
+    assert session['session_id'] == session_id
+    assert session['file_name'] == 'data.csv'
+    assert session['analysis_count'] == 3
+    assert stats['total_analyses'] == 3
+    assert stats['total_files'] == 1
+    assert stats['last_file'] == 'data.csv'
+
+    print("✅ session round trip OK")
+
+
+def test_apply_batch():
+    """כתיבות מהתור נכתבות בטרנזקציה אחת, כולל ניתוח עם ערכים שאינם JSON"""
+    print("🔍 Testing DatabaseManager.apply_batch...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, 'bot.db'))
+        session_id = db.create_session(1, 'data.csv', 'csv', 1024)
+        db.apply_batch([
+            ('user', (1, 'user', 'First', 'Last')),
+            ('sheet', (1, 'https://docs.google.com/spreadsheets/d/abc', 'גיליון')),
+            ('analysis', (session_id, 'comprehensive_analysis', {'dtype': np.dtype('float64')})),
+        ])
+
+        session = db.get_active_session(1)
+        sheets = db.get_user_sheets(1)
+        db.close()
+
+    assert session['analysis_count'] == 1
+    assert [sheet['sheet_title'] for sheet in sheets] == ['גיליון']
+
+    print("✅ apply_batch OK")
+
+
+def test_apply_batch_skips_failing_op():
+    """פעולה שנכשלת באמצע התור מדולגת ושאר הכתיבות נשמרות"""
+    print("🔍 Testing DatabaseManager.apply_batch with a failing op...")
+
+    circular = {}
+    circular['self'] = circular
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, 'bot.db'))
+        session_id = db.create_session(1, 'data.csv', 'csv', 1024)
+        db.apply_batch([
+            ('user', (1, 'user', 'First', 'Last')),
+            ('analysis', (session_id, 'broken', circular)),
+            ('sheet', (2, 'https://docs.google.com/spreadsheets/d/abc', 'גיליון')),
+            ('analysis', (session_id, 'comprehensive_analysis', {'rows': 10})),
+        ])
+
+        session = db.get_active_session(1)
+        sheets = db.get_user_sheets(2)
+        db.close()
+
+    assert session['analysis_count'] == 1
+    assert [sheet['sheet_title'] for sheet in sheets] == ['גיליון']
+
+    print("✅ apply_batch failing op OK")
+
+
+def test_in_memory_database():
+    """מסד נתונים בזיכרון משתמש בחיבור אחד גם לקריאה"""
+    print("🔍 Testing DatabaseManager in memory...")
+
+    db = DatabaseManager(':memory:')
+    db.add_user(2, 'memory')
+    session_id = db.create_session(2, 'sheet', 'google_sheets', 0)
+
+    assert db.get_active_session(2)['session_id'] == session_id
+
+    # עדכונים מבטלים את התוצאות השמורות במטמון
+    db.update_session_analysis(session_id, 'basic_info', {'עיר': 'חיפה'})
+    assert db.get_active_session(2)['analysis_count'] == 1
+    with db._writer() as conn:
+        stored = conn.execute("SELECT json(analysis_data) FROM analysis_history").fetchone()[0]
+    assert stored == '{"עיר":"חיפה"}'
+    db.add_google_sheets_connection(2, 'https://docs.google.com/spreadsheets/d/abc', 'גיליון')
+    db.add_google_sheets_connection(2, 'https://docs.google.com/spreadsheets/d/abc', 'גיליון 2')
+    assert [sheet['sheet_title'] for sheet in db.get_user_sheets(2)] == ['גיליון 2']
+    db.close()
+
+    print("✅ in-memory database OK")
+
+
+def test_run_async_uses_executor():
+    """פעולות מסד הנתונים רצות מקוד אסינכרוני דרך תהליכון נפרד"""
+    print("🔍 Testing DatabaseManager.run_async...")
+
+    db = DatabaseManager(':memory:')
+
+    async def scenario():
+        await db.run_async(db.add_user, 3, username='async')
+        session_id = await db.run_async(db.create_session, 3, 'async.csv', 'csv', 10)
+        return session_id, await db.run_async(db.get_active_session, 3)
+
+    session_id, session = asyncio.run(scenario())
+    db.close()
+
+    assert session['session_id'] == session_id
+
+    print("✅ run_async OK")
+
+
+def test_user_activity_is_flushed_in_batch():
+    """זמני פעילות נאספים בזיכרון ונכתבים בבת אחת"""
+    print("🔍 Testing DatabaseManager activity batching...")
+
+    db = DatabaseManager(':memory:')
+    db.add_user(4, 'active')
+    with db._writer() as conn:
+        conn.execute("UPDATE users SET last_activity = '2000-01-01 00:00:00' WHERE user_id = 4")
+
+    db.update_user_activity(4)
+    with db._writer() as conn:
+        before = conn.execute("SELECT last_activity FROM users WHERE user_id = 4").fetchone()[0]
+
+    db.flush_user_activity()
+    with db._writer() as conn:
+        after = conn.execute("SELECT last_activity FROM users WHERE user_id = 4").fetchone()[0]
+    db.close()
+
+    assert before == '2000-01-01 00:00:00'
+    assert after > before
+
+    print("✅ activity batching OK")
+
+
+if __name__ == "__main__":
+    test_database_uses_wal_journal()
+    test_session_round_trip()
+    test_apply_batch()
+    test_apply_batch_skips_failing_op()
+    test_in_memory_database()
+    test_run_async_uses_executor()
+    test_user_activity_is_flushed_in_batch()
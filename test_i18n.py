@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the i18n translation helpers
+"""
+
+from i18n import t, get_default_language
+
+
+def test_translation_lookup_and_fallback():
+    """Hebrew by default, English fallback, key itself when missing"""
+    print("🔍 Testing i18n.t lookups...")
+
+    assert t('report_title', 'he') == "דוח ניתוח נתונים מקיף"
+    assert t('report_title', 'en') == "Comprehensive Data Analysis Report"
+    assert t('column', 'en') == "עמודה"
+    assert t('no_such_key', 'he') == 'no_such_key'
+    assert t('report_title') == t('report_title', get_default_language())
+    assert t('no_such_key') == 'no_such_key'
+
+    print("✅ lookups OK")
+
+
+def test_translation_formatting():
+    """Format arguments are applied, including unhashable ones"""
+    print("🔍 Testing i18n.t formatting...")
+
+    assert t('data_quality_score', 'he', score=87) == "ציון איכות נתונים: 87/100"
+    assert t('data_quality_score', 'he', score=True) == "ציון איכות נתונים: True/100"
+    assert t('data_quality_score', 'he', score=[1]) == "ציון איכות נתונים: [1]/100"
+    assert t('data_quality_score', 'he', wrong=1) == "ציון איכות נתונים: {score}/100"
+
+    print("✅ formatting OK")
+
+
+if __name__ == "__main__":
+    test_translation_lookup_and_fallback()
+    test_translation_formatting()
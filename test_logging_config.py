@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the centralized logging configuration
+"""
+
+import logging
+
+from logging_config import setup_logging, reconfigure_logging
+
+
+def test_setup_logging_is_idempotent():
+    """Repeated setup calls keep a single console handler"""
+    print("🔍 Testing setup_logging idempotence...")
+
+    root = setup_logging()
+    handlers = list(root.handlers)
+
+    assert setup_logging() is root
+    assert root.handlers == handlers
+
+    reconfigure_logging()
+    console = [h for h in root.handlers if type(h) is logging.StreamHandler]
+    assert len(console) == 1
+    assert console[0] not in handlers
+
+    print("✅ setup_logging idempotence OK")
+
+
+if __name__ == "__main__":
+    test_setup_logging_is_idempotent()
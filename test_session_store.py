@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בדיקות למאגר הסשנים - Tests for the SessionStore module
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+
+from session_store import SessionStore
+
+
+def test_sessions_are_created_and_updated():
+    """סשן נוצר בגישה הראשונה ומתעדכן במקום"""
+    print("🔍 Testing SessionStore get/update...")
+
+    store = SessionStore()
+    session = store.get(1)
+    assert session['state'] == 'main_menu'
+    assert session['data_path'] is None
+
+    store.update(1, {'state': 'waiting_for_question', 'file_name': 'data.csv'})
+    assert store.get(1) is session
+    assert session['file_name'] == 'data.csv'
+
+    assert store.reset(1)['state'] == 'main_menu'
+    assert 'file_name' not in store.get(1)
+
+    print("✅ get/update OK")
+
+
+def test_idle_sessions_expire():
+    """סשנים שלא היו פעילים מעבר לזמן החיים נמחקים"""
+    print("🔍 Testing SessionStore expiry...")
+
+    store = SessionStore(ttl=10.0)
+    store.update(1, {'file_name': 'old.csv'})
+    store.get(2)
+
+    seen = store._last_seen[1]
+    assert store.evict_expired(seen + 5.0) == 0
+    store._last_seen[2] = seen + 8.0
+    assert store.evict_expired(seen + 11.0) == 1
+
+    assert 1 not in store
+    assert 2 in store
+    assert 'file_name' not in store.get(1)
+
+    print("✅ expiry OK")
+
+
+def test_data_is_kept_on_disk():
+    """הטבלה נשמרת בקובץ, נטענת לפי דרישה ונמחקת עם הסשן"""
+    print("🔍 Testing SessionStore data files...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SessionStore(data_dir=tmp_dir)
+        assert store.load_data(1) is None
+
+        df = pd.DataFrame({'עיר': ['חיפה', 'נתניה'], 'מכירות': [1.5, 2.0]})
+        path = store.store_data(1, df)
+
+        assert store.get(1)['data_path'] == path
+        pd.testing.assert_frame_equal(store.load_data(1), df)
+
+        store.reset(1)
+        assert not os.path.exists(path)
+        assert store.load_data(1) is None
+
+    print("✅ data files OK")
+
+
+def test_session_count_is_capped():
+    """מעבר למספר הסשנים המרבי נמחק הסשן שלא היה פעיל הכי הרבה זמן, יחד עם הקבצים שלו"""
+    print("🔍 Testing SessionStore LRU cap...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SessionStore(data_dir=tmp_dir, max_sessions=2)
+        chart_file = os.path.join(tmp_dir, 'chart.png')
+        open(chart_file, 'wb').close()
+
+        store.update(1, {'chart_files': [chart_file]})
+        store.get(2)
+        store.get(1)
+        store.get(3)
+
+        assert len(store) == 2
+        assert 2 not in store
+        assert 1 in store and 3 in store
+
+        store.get(4)
+        assert 1 not in store
+        assert not os.path.exists(chart_file)
+
+    print("✅ LRU cap OK")
+
+
+if __name__ == "__main__":
+    test_sessions_are_created_and_updated()
+    test_idle_sessions_expire()
+    test_data_is_kept_on_disk()
+    test_session_count_is_capped()
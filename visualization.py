@@ -71,36 +71,58 @@ class ChartGenerator:
             else:
                 df_sorted = df.sort_values(y_column, ascending=False)
             
-            plt.figure(figsize=CHART_CONFIG['figure_size'])
-            
-            # יצירת התרשים
-            bars = plt.bar(range(len(df_sorted)), df_sorted[y_column], 
-                          color=sns.color_palette("husl", len(df_sorted)))
+            return self._draw_bar_chart(df_sorted[x_column], df_sorted[y_column].to_numpy(),
+                                        x_column, y_column, title)
             
-            # הגדרת תוויות
-            plt.xlabel(self._he(x_column), fontsize=12)
-            plt.ylabel(self._he(y_column), fontsize=12)
-            plt.title(self._he(title), fontsize=14, fontweight='bold')
-            
-            # הגדרת תוויות ציר X
-            plt.xticks(range(len(df_sorted)), self._he_list(df_sorted[x_column]), rotation=45, ha='right')
-            
-            # הוספת ערכים על העמודות
-            for i, bar in enumerate(bars):
-                height = bar.get_height()
-                plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                        f'{height:.1f}', ha='center', va='bottom')
-            
-            plt.tight_layout()
+        except Exception as e:
+            logger.error(f"Error creating bar chart: {e}")
+            return None
+    
+    def create_bar_chart_from_series(self, values: pd.Series, title: str = "תרשים עמודות",
+                                     x_label: str = "Column", y_label: str = "Mean",
+                                     max_bars: int = 20) -> str:
+        """יצירת תרשים עמודות ישירות מ-Series (תווית -> ערך), ללא בניית DataFrame"""
+        try:
+            if len(values) > max_bars:
+                values = values.nlargest(max_bars)
+                title += f" (Top {max_bars})"
+            else:
+                values = values.sort_values(ascending=False)
             
-            # שמירת התרשים
-            filename = self._save_chart("bar_chart")
-            return filename
+            return self._draw_bar_chart(values.index, values.to_numpy(), x_label, y_label, title)
             
         except Exception as e:
             logger.error(f"Error creating bar chart: {e}")
             return None
     
+    def _draw_bar_chart(self, labels, heights: np.ndarray, x_label: str, y_label: str, title: str) -> str:
+        """ציור ושמירת תרשים עמודות לפי תוויות וגבהים ממוינים"""
+        plt.figure(figsize=CHART_CONFIG['figure_size'])
+        
+        # יצירת התרשים
+        bars = plt.bar(range(len(heights)), heights,
+                      color=sns.color_palette("husl", len(heights)))
+        
+        # הגדרת תוויות
+        plt.xlabel(self._he(x_label), fontsize=12)
+        plt.ylabel(self._he(y_label), fontsize=12)
+        plt.title(self._he(title), fontsize=14, fontweight='bold')
+        
+        # הגדרת תוויות ציר X
+        plt.xticks(range(len(heights)), self._he_list(labels), rotation=45, ha='right')
+        
+        # הוספת ערכים על העמודות
+        for i, bar in enumerate(bars):
+            height = bar.get_height()
+            plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
+                    f'{height:.1f}', ha='center', va='bottom')
+        
+        plt.tight_layout()
+        
+        # שמירת התרשים
+        filename = self._save_chart("bar_chart")
+        return filename
+    
     def create_line_chart(self, df: pd.DataFrame, x_column: str, y_column: str,
                          title: str = "תרשים קווי") -> str:
         """יצירת תרשים קווי"""
@@ -329,10 +351,7 @@ class ChartGenerator:
                 # תרשים עמודות לממוצעים
                 means = df[numeric_cols].mean().sort_values(ascending=False)
                 if len(means) > 0:
-                    bar_file = self.create_bar_chart(
-                        pd.DataFrame({'Column': means.index, 'Mean': means.values}),
-                        'Column', 'Mean', "ממוצעים לפי עמודות"
-                    )
+                    bar_file = self.create_bar_chart_from_series(means, "ממוצעים לפי עמודות")
                     if bar_file:
                         chart_files.append(bar_file)
             